@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+import callbacks
+
+
+TOKEN = "42:benchmark"
+
+
+def _update(data: str) -> Update:
+    user = User(id=1, is_bot=False, first_name="bench")
+    message = Message(
+        message_id=1,
+        date=datetime.now(),
+        chat=Chat(id=1, type="private"),
+        text="bench",
+    )
+    query = CallbackQuery(id="1", from_user=user, chat_instance="bench", message=message, data=data)
+    return Update(update_id=1, callback_query=query)
+
+
+def linear_router() -> Router:
+    router = Router()
+
+    async def handler(call: CallbackQuery) -> None:
+        pass
+
+    async def handler_with_id(call: CallbackQuery) -> None:
+        int(call.data.split(":")[-1])
+
+    for prefix, action in callbacks.LEGACY_PREFIXES.items():
+        if callbacks.ARITY[action]:
+            router.callback_query.register(handler_with_id, F.data.startswith(f"{prefix}:"))
+        else:
+            router.callback_query.register(handler, F.data == prefix)
+    return router
+
+
+def table_router() -> Router:
+    router = Router()
+
+    async def handler(call: CallbackQuery, *args: int) -> None:
+        pass
+
+    routes = {action: handler for action in callbacks.ARITY}
+
+    @router.callback_query()
+    async def dispatch(call: CallbackQuery) -> None:
+        callback = callbacks.decode(call.data)
+        if callback is not None:
+            await routes[callback.action](call, *callback.args)
+
+    return router
+
+
+def samples(legacy: bool) -> list[str]:
+    result = []
+    for prefix, action in callbacks.LEGACY_PREFIXES.items():
+        args = tuple(range(1, callbacks.ARITY[action] + 1))
+        if legacy:
+            result.append(":".join((prefix, *map(str, args))))
+        else:
+            result.append(callbacks.encode(action, *args))
+    return result
+
+
+async def _time_update(dispatcher: Dispatcher, bot: Bot, update: Update, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await dispatcher.feed_update(bot, update)
+    return (time.perf_counter() - started) / rounds
+
+
+async def measure(setups: dict[str, tuple[Router, list[str]]], rounds: int, repeat: int) -> dict[str, dict]:
+    # Setups are timed interleaved, best of `repeat`, so CPU throttling hits both alike.
+    bot = Bot(TOKEN)
+    prepared = {}
+    for name, (router, data) in setups.items():
+        dispatcher = Dispatcher()
+        dispatcher.include_router(router)
+        prepared[name] = (dispatcher, [_update(item) for item in data])
+    timings = {name: [float("inf")] * len(updates) for name, (_, updates) in prepared.items()}
+    try:
+        for name, (dispatcher, updates) in prepared.items():
+            for update in updates:
+                await _time_update(dispatcher, bot, update, max(1, rounds // 10))
+        count = min(len(updates) for _, updates in prepared.values())
+        for _ in range(repeat):
+            for index in range(count):
+                for name, (dispatcher, updates) in prepared.items():
+                    elapsed = await _time_update(dispatcher, bot, updates[index], rounds)
+                    timings[name][index] = min(timings[name][index], elapsed)
+    finally:
+        await bot.session.close()
+    return {
+        name: {
+            "handlers": len(per_action),
+            "mean_us": sum(per_action) / len(per_action) * 1e6,
+            "first_us": per_action[0] * 1e6,
+            "last_us": per_action[-1] * 1e6,
+            "worst_us": max(per_action) * 1e6,
+        }
+        for name, per_action in timings.items()
+    }
+
+
+def measure_codec(data: list[str], rounds: int) -> dict[str, float]:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for item in data:
+            callbacks.decode(item)
+    return {"decode_us": (time.perf_counter() - started) / (rounds * len(data)) * 1e6}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare callback routing cost of filter chains and the dispatch table.")
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5, help="best of N timings per callback")
+    args = parser.parse_args()
+    setups = {
+        "filter_chain": (linear_router(), samples(legacy=True)),
+        "dispatch_table": (table_router(), samples(legacy=False)),
+    }
+    results = await measure(setups, args.rounds, args.repeat)
+    results["codec"] = measure_codec(samples(legacy=False), args.rounds)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable
+from zoneinfo import ZoneInfo
+
+from db import Database
+
+
+TIMEZONE = ZoneInfo("Europe/Moscow")
+SEED_CHUNK = 10_000
+
+
+async def seed(db: Database, now: datetime, events: int) -> None:
+    for start in range(0, events, SEED_CHUNK):
+        await db.create_events(
+            [
+                (now + timedelta(minutes=10 * index), f"Event {index}\nDescription of event {index}", 30, None)
+                for index in range(start, min(events, start + SEED_CHUNK))
+            ]
+        )
+
+
+async def _measure(fn: Callable[[], Awaitable[int]], repeat: int) -> dict[str, float]:
+    best = float("inf")
+    rows = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = await fn()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    await fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"rows": rows, "seconds": best, "peak_kib": peak / 1024}
+
+
+async def run(events: int, repeat: int, workdir: Path) -> dict[str, dict[str, float]]:
+    db = Database(str(workdir / "rows.db"), TIMEZONE)
+    now = datetime.now(TIMEZONE)
+    try:
+        await seed(db, now, events)
+        until = now + timedelta(minutes=10 * events + 60)
+
+        async def full_rows() -> int:
+            return len(await db.list_future_events(now))
+
+        async def full_rows_with_dates() -> int:
+            rows = await db.list_future_events(now)
+            for event in rows:
+                event.start_at
+            return len(rows)
+
+        async def streamed_rows() -> int:
+            count = 0
+            async for _ in db.iter_future_events(now):
+                count += 1
+            return count
+
+        async def reminder_projection() -> int:
+            return len(await db.list_due_reminders(now - timedelta(hours=1), until))
+
+        return {
+            "list_future_events": await _measure(full_rows, repeat),
+            "list_future_events_decoded": await _measure(full_rows_with_dates, repeat),
+            "iter_future_events": await _measure(streamed_rows, repeat),
+            "list_due_reminders": await _measure(reminder_projection, repeat),
+        }
+    finally:
+        await db.close()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure time and peak allocations of event list queries.")
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3, help="best of N timings per query")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        results = await run(args.events, args.repeat, Path(workdir))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import time
+from typing import Any, Iterable
+
+from aiohttp import ClientSession, web
+
+
+# Only new messages are subject to injected 403/429s; handler edits always succeed.
+SEND_METHODS = ("sendMessage", "sendPhoto")
+
+
+class FakeTelegram:
+    def __init__(
+        self,
+        latency: float = 0.0,
+        blocked: Iterable[int] = (),
+        flood_every: int = 0,
+        retry_after: int = 1,
+    ):
+        self.latency = latency
+        self.blocked = set(blocked)
+        self.flood_every = flood_every
+        self.retry_after = retry_after
+        self.errors: dict[int, int] = {}
+        self.webhook_url: str | None = None
+        self.webhook_secret: str | None = None
+        self.calls: dict[str, int] = {}
+        self.sent_at: dict[int, list[float]] = {}
+        self._updates: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._sends = itertools.count(1)
+        self._runner: web.AppRunner | None = None
+        self._client: ClientSession | None = None
+        self._delivered = asyncio.Condition()
+        self.base_url = ""
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_route("POST", "/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        self._client = ClientSession()
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def message_update(self, chat_id: int, text: str) -> dict[str, Any]:
+        return {
+            "update_id": next(self._update_ids),
+            "message": {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "from": {"id": chat_id, "is_bot": False, "first_name": "user"},
+                "text": text,
+            },
+        }
+
+    def callback_update(self, chat_id: int, data: str, message_text: str = "") -> dict[str, Any]:
+        return {
+            "update_id": next(self._update_ids),
+            "callback_query": {
+                "id": str(next(self._update_ids)),
+                "from": {"id": chat_id, "is_bot": False, "first_name": "user"},
+                "chat_instance": str(chat_id),
+                "data": data,
+                "message": {
+                    "message_id": next(self._message_ids),
+                    "date": int(time.time()),
+                    "chat": {"id": chat_id, "type": "private"},
+                    "text": message_text,
+                },
+            },
+        }
+
+    async def push(self, update: dict[str, Any]) -> None:
+        if self.webhook_url:
+            headers = {}
+            if self.webhook_secret:
+                headers["X-Telegram-Bot-Api-Secret-Token"] = self.webhook_secret
+            async with self._client.post(self.webhook_url, json=update, headers=headers) as response:
+                response.raise_for_status()
+        else:
+            await self._updates.put(update)
+
+    async def wait_for_sends(self, chat_ids: list[int], timeout: float = 30.0) -> None:
+        async with self._delivered:
+            await asyncio.wait_for(
+                self._delivered.wait_for(lambda: all(chat_id in self.sent_at for chat_id in chat_ids)),
+                timeout,
+            )
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] = self.calls.get(method, 0) + 1
+        params = dict(await request.post())
+        if method == "getUpdates":
+            return self._ok(await self._get_updates(params))
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        result = await self._dispatch(method, params)
+        if isinstance(result, web.Response):
+            return result
+        return self._ok(result)
+
+    async def _dispatch(self, method: str, params: dict[str, Any]) -> Any:
+        if method == "getMe":
+            return {"id": 1, "is_bot": True, "first_name": "bench", "username": "bench_bot"}
+        if method == "setWebhook":
+            self.webhook_url = params.get("url")
+            self.webhook_secret = params.get("secret_token")
+            return True
+        if method == "deleteWebhook":
+            self.webhook_url = None
+            return True
+        if method in ("sendMessage", "sendPhoto", "editMessageText", "editMessageCaption", "editMessageReplyMarkup"):
+            chat_id = int(params.get("chat_id", 0))
+            if method in SEND_METHODS and chat_id in self.blocked:
+                return self._error(403, "Forbidden: bot was blocked by the user")
+            if method in SEND_METHODS and self.flood_every and next(self._sends) % self.flood_every == 0:
+                return self._error(
+                    429,
+                    f"Too Many Requests: retry after {self.retry_after}",
+                    {"retry_after": self.retry_after},
+                )
+            await self._record_send(chat_id)
+            message: dict[str, Any] = {
+                "message_id": int(params.get("message_id") or next(self._message_ids)),
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+            }
+            if method == "sendPhoto":
+                message["photo"] = [
+                    {"file_id": params.get("photo", ""), "file_unique_id": "u", "width": 1, "height": 1}
+                ]
+                message["caption"] = params.get("caption", "")
+            else:
+                message["text"] = params.get("text", params.get("caption", ""))
+            return message
+        return True
+
+    async def _record_send(self, chat_id: int) -> None:
+        async with self._delivered:
+            self.sent_at.setdefault(chat_id, []).append(time.perf_counter())
+            self._delivered.notify_all()
+
+    async def _get_updates(self, params: dict[str, Any]) -> list[dict[str, Any]]:
+        timeout = float(params.get("timeout", 0) or 0)
+        updates = []
+        try:
+            updates.append(await asyncio.wait_for(self._updates.get(), timeout or 0.01))
+        except asyncio.TimeoutError:
+            return []
+        while not self._updates.empty() and len(updates) < 100:
+            updates.append(self._updates.get_nowait())
+        return updates
+
+    def _error(self, code: int, description: str, parameters: dict[str, Any] | None = None) -> web.Response:
+        self.errors[code] = self.errors.get(code, 0) + 1
+        body: dict[str, Any] = {"ok": False, "error_code": code, "description": description}
+        if parameters:
+            body["parameters"] = parameters
+        return web.Response(text=json.dumps(body), status=code, content_type="application/json")
+
+    def _ok(self, result: Any) -> web.Response:
+        return web.Response(
+            text=json.dumps({"ok": True, "result": result}),
+            content_type="application/json",
+        )
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Update
+
+import callbacks
+from benchmarks.fake_telegram import FakeTelegram
+from config import Config
+from db import Database
+from fanout import GLOBAL_RATE, ReminderFanOut
+from handlers import build_router
+from scheduler import ReminderScheduler
+
+
+TIMEZONE = ZoneInfo("Europe/Moscow")
+TOKEN = "42:benchmark"
+HANDLER_USER_ID = 10_000_000
+
+
+def _summary(latencies: list[float]) -> dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[max(0, int(len(ordered) * 0.95) - 1)] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+async def seed(db: Database, now: datetime, events: int, subscribers: int) -> int:
+    event_ids = await db.create_events(
+        [
+            (now + timedelta(hours=1 + index), f"Benchmark event {index}\nDetails", 30, None)
+            for index in range(events)
+        ]
+    )
+    target = event_ids[0]
+    for user_id in range(1, subscribers + 1):
+        await db.add_subscription(user_id, target, now)
+    await db.flush_subscriptions()
+    return target
+
+
+async def measure_restore(db: Database, bot: Bot, now: datetime) -> dict[str, float]:
+    scheduler = ReminderScheduler(db, bot, TIMEZONE)
+    started = time.perf_counter()
+    await scheduler.restore(now)
+    return {"seconds": time.perf_counter() - started}
+
+
+async def measure_handlers(
+    dispatcher: Dispatcher,
+    bot: Bot,
+    fake: FakeTelegram,
+    event_id: int,
+    samples: int,
+) -> dict[str, dict[str, float]]:
+    cases = {
+        "show_event": callbacks.encode(callbacks.EVENT_OPEN, event_id),
+        "list_events": callbacks.encode(callbacks.EVENTS),
+    }
+    results = {}
+    for name, data in cases.items():
+        latencies = []
+        for index in range(samples):
+            raw = fake.callback_update(HANDLER_USER_ID + index, data, message_text="…")
+            update = Update.model_validate(raw, context={"bot": bot})
+            started = time.perf_counter()
+            await dispatcher.feed_update(bot, update)
+            latencies.append(time.perf_counter() - started)
+        results[name] = _summary(latencies)
+    return results
+
+
+async def measure_fanout(scheduler: ReminderScheduler, fake: FakeTelegram, event_id: int) -> dict[str, float]:
+    errors_before = dict(fake.errors)
+    started = time.perf_counter()
+    report = await scheduler.send_reminder(event_id)
+    elapsed = time.perf_counter() - started
+    attempted = report.delivered + report.failed + report.pruned
+    return {
+        "seconds": elapsed,
+        "delivered": report.delivered,
+        "failed": report.failed,
+        "pruned": report.pruned,
+        "throughput_per_s": attempted / elapsed if elapsed else 0.0,
+        "rate_limited": fake.errors.get(429, 0) - errors_before.get(429, 0),
+        "forbidden": fake.errors.get(403, 0) - errors_before.get(403, 0),
+    }
+
+
+async def run(args: argparse.Namespace, workdir: Path) -> dict:
+    rng = random.Random(args.seed)
+    blocked = rng.sample(range(1, args.subscribers + 1), int(args.subscribers * args.blocked_ratio))
+    fake = FakeTelegram(
+        latency=args.latency,
+        blocked=blocked,
+        flood_every=args.flood_every,
+        retry_after=args.retry_after,
+    )
+    base_url = await fake.start()
+    bot = Bot(TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(base_url)))
+    config = Config(token=TOKEN, admin_ids=set(), db_path=str(workdir / "load.db"), timezone=TIMEZONE)
+    db = Database(config.db_path, TIMEZONE)
+    try:
+        now = datetime.now(TIMEZONE)
+        started = time.perf_counter()
+        event_id = await seed(db, now, args.events, args.subscribers)
+        seed_seconds = time.perf_counter() - started
+        restore = await measure_restore(db, bot, now)
+        scheduler = ReminderScheduler(db, bot, TIMEZONE, fanout=ReminderFanOut(rate=args.rate))
+        dispatcher = Dispatcher()
+        dispatcher.include_router(build_router(config, db, scheduler))
+        handlers = await measure_handlers(dispatcher, bot, fake, event_id, args.samples)
+        fanout = await measure_fanout(scheduler, fake, event_id)
+    finally:
+        await bot.session.close()
+        await db.close()
+        await fake.stop()
+    return {
+        "parameters": {**vars(args), "python": platform.python_version()},
+        "seed_seconds": seed_seconds,
+        "restore": restore,
+        "handlers": handlers,
+        "fanout": fanout,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure reminder fan-out, handler latency and restore time.")
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--subscribers", type=int, default=300)
+    parser.add_argument("--samples", type=int, default=200, help="handler calls per measured handler")
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated Bot API latency, seconds")
+    parser.add_argument("--blocked-ratio", type=float, default=0.05, help="share of subscribers answering 403")
+    parser.add_argument("--flood-every", type=int, default=100, help="answer every Nth send with 429, 0 to disable")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--rate", type=float, default=GLOBAL_RATE, help="fan-out rate limit, messages per second")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        results = await run(args, Path(workdir))
+    text = json.dumps(results, indent=2, default=str)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
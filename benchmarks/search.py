@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from db import Database
+
+
+TIMEZONE = ZoneInfo("Europe/Moscow")
+SEED_CHUNK = 10_000
+WORDS = (
+    "концерт лекция встреча турнир выставка мастер-класс семинар показ ярмарка забег "
+    "джаз рок классика живопись фотография кино театр шахматы футбол йога "
+    "город парк библиотека клуб музей галерея набережная площадь двор школа"
+).split()
+
+
+def _summary(latencies: list[float]) -> dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[max(0, int(len(ordered) * 0.95) - 1)] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+async def seed(db: Database, now: datetime, events: int, rng: random.Random) -> None:
+    for start in range(0, events, SEED_CHUNK):
+        await db.create_events(
+            [
+                (now + timedelta(minutes=10 * index), " ".join(rng.choices(WORDS, k=8)) + f" #{index}", 30, None)
+                for index in range(start, min(events, start + SEED_CHUNK))
+            ]
+        )
+
+
+async def measure(db: Database, now: datetime, queries: list[str], limit: int) -> dict[str, float]:
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        await db.search_events(query, now, limit)
+        latencies.append(time.perf_counter() - started)
+    return _summary(latencies)
+
+
+async def run(args: argparse.Namespace, workdir: Path) -> dict:
+    rng = random.Random(args.seed)
+    db = Database(str(workdir / "search.db"), TIMEZONE)
+    try:
+        now = datetime.now(TIMEZONE)
+        await seed(db, now, args.events, rng)
+        queries = [" ".join(rng.sample(WORDS, rng.randint(1, 3))) for _ in range(args.queries)]
+        prefixes = [word[:3] for word in rng.choices(WORDS, k=args.queries)]
+        rare = [f"{rng.choice(WORDS)} {rng.randrange(args.events)}" for _ in range(args.queries)]
+        cold = await measure(db, now, queries, args.limit)
+        warm = await measure(db, now, queries, args.limit)
+        prefix = await measure(db, now, prefixes, args.limit)
+        selective = await measure(db, now, rare, args.limit)
+        return {
+            "parameters": vars(args),
+            "cold": cold,
+            "cached": warm,
+            "prefix": prefix,
+            "selective": selective,
+            "cache": db.cache_stats()["searches"],
+        }
+    finally:
+        await db.close()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure full-text event search latency.")
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        results = await run(args, Path(workdir))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import socket
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+
+from benchmarks.fake_telegram import FakeTelegram
+from config import Config
+from db import Database
+from handlers import build_router
+from scheduler import ReminderScheduler
+from webhook import start_webhook_server
+
+
+TIMEZONE = ZoneInfo("Europe/Moscow")
+TOKEN = "42:benchmark"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _summary(latencies: list[float]) -> dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p95_ms": ordered[int(len(ordered) * 0.95) - 1] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+async def measure(mode: str, updates: int, burst: int, latency: float, workdir: Path) -> dict[str, float]:
+    fake = FakeTelegram(latency=latency)
+    base_url = await fake.start()
+    port = _free_port()
+    config = Config(
+        token=TOKEN,
+        admin_ids=set(),
+        db_path=str(workdir / f"{mode}.db"),
+        timezone=TIMEZONE,
+        mode=mode,
+        webhook_url=f"http://127.0.0.1:{port}",
+        webhook_host="127.0.0.1",
+        webhook_port=port,
+        webhook_secret="benchmark",
+    )
+    bot = Bot(config.token, session=AiohttpSession(api=TelegramAPIServer.from_base(base_url)))
+    db = Database(config.db_path, config.timezone)
+    scheduler = ReminderScheduler(db, bot, config.timezone)
+    dispatcher = Dispatcher()
+    dispatcher.include_router(build_router(config, db, scheduler))
+    runner = None
+    polling = None
+    if mode == "webhook":
+        runner = await start_webhook_server(dispatcher, bot, config)
+        await bot.set_webhook(config.webhook_url + config.webhook_path, secret_token=config.webhook_secret)
+    else:
+        polling = asyncio.create_task(dispatcher.start_polling(bot, handle_signals=False, polling_timeout=5))
+    latencies = []
+    try:
+        chat_ids = list(range(1, updates + 1))
+        for start in range(0, updates, burst):
+            batch = chat_ids[start:start + burst]
+            pushed_at = {}
+            for chat_id in batch:
+                pushed_at[chat_id] = time.perf_counter()
+            await asyncio.gather(*(fake.push(fake.message_update(chat_id, "/start")) for chat_id in batch))
+            await fake.wait_for_sends(batch)
+            latencies.extend(fake.sent_at[chat_id][0] - pushed_at[chat_id] for chat_id in batch)
+    finally:
+        if polling is not None:
+            await dispatcher.stop_polling()
+            await polling
+        if runner is not None:
+            await runner.cleanup()
+        await bot.session.close()
+        await db.close()
+        await fake.stop()
+    return _summary(latencies)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare update latency of polling and webhook modes.")
+    parser.add_argument("--updates", type=int, default=500)
+    parser.add_argument("--burst", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated Bot API latency, seconds")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as workdir:
+        results = {
+            mode: await measure(mode, args.updates, args.burst, args.latency, Path(workdir))
+            for mode in ("polling", "webhook")
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
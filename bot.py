@@ -1,14 +1,22 @@
 import asyncio
 import logging
-from datetime import datetime
+import multiprocessing
+import os
+import socket
+from datetime import datetime, timedelta
 
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
 
+import metrics
+import render
 from config import load_config
 from db import Database
+from fsm_storage import SQLiteStorage
 from handlers import build_router
+from leader import LeaderElection
 from scheduler import ReminderScheduler
+from throttling import CallbackThrottleMiddleware
+from webhook import run_webhook
 
 
 logging.basicConfig(
@@ -16,20 +24,85 @@ logging.basicConfig(
     format="%(asctime)s [%(levelname)s] %(message)s",
 )
 
+SHARED_CACHE_TTL = 5
 
-async def main() -> None:
+
+async def main(worker: int = 0) -> None:
     config = load_config()
     bot = Bot(token=config.token)
-    storage = MemoryStorage()
+    if config.workers > 1:
+        # Updates from one user may reach any worker, so FSM state is always read from the database.
+        db = Database(config.db_path, config.timezone, cache_ttl=SHARED_CACHE_TTL)
+        storage = SQLiteStorage(db, ttl=config.fsm_ttl, cache_size=0)
+    else:
+        db = Database(config.db_path, config.timezone)
+        storage = SQLiteStorage(db, ttl=config.fsm_ttl)
+    db.add_change_listener(render.invalidate)
     dispatcher = Dispatcher(storage=storage)
-    db = Database(config.db_path)
-    scheduler = ReminderScheduler(db, bot, config.timezone)
+    throttle = CallbackThrottleMiddleware()
+    dispatcher.callback_query.outer_middleware(throttle)
+    scheduler = ReminderScheduler(
+        db,
+        bot,
+        config.timezone,
+        refill_interval=timedelta(seconds=config.refill_interval),
+    )
     router = build_router(config, db, scheduler)
     dispatcher.include_router(router)
-    scheduler.start()
-    scheduler.restore(now=datetime.now(config.timezone))
-    await dispatcher.start_polling(bot)
+    metrics_runner = None
+    if config.metrics_port is not None:
+        metrics.instrument_database(db)
+        metrics.instrument_router(router)
+        metrics_runner = await metrics.start_metrics_server(config.metrics_host, config.metrics_port + worker)
+
+    async def lead() -> None:
+        scheduler.start()
+        await scheduler.restore(now=datetime.now(config.timezone))
+
+    async def step_down() -> None:
+        await scheduler.shutdown()
+
+    election = LeaderElection(db, f"{socket.gethostname()}:{os.getpid()}", lead, step_down)
+    election.start()
+    storage.start()
+    try:
+        if config.mode == "webhook":
+            await run_webhook(dispatcher, bot, config)
+        else:
+            await bot.delete_webhook()
+            await dispatcher.start_polling(bot)
+    finally:
+        await election.close()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await storage.close()
+        await db.close()
+        logging.info("Callback throttling stats: %s", throttle.stats())
+        logging.info("Render cache stats: %s", render.stats())
+
+
+def run_worker(worker: int) -> None:
+    asyncio.run(main(worker))
+
+
+def run() -> None:
+    workers = load_config().workers
+    if workers == 1:
+        run_worker(0)
+        return
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=run_worker, args=(worker,)) for worker in range(workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+            if process.exitcode:
+                logging.error("Worker %s exited with code %s", process.name, process.exitcode)
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run()
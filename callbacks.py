@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+SEPARATOR = ":"
+MAX_CALLBACK_DATA = 64
+
+MENU = "m"
+NOOP = "n"
+EVENTS = "l"
+EVENTS_NEXT = "ln"
+EVENTS_PREV = "lp"
+MY_EVENTS = "r"
+MY_EVENTS_NEXT = "rn"
+MY_EVENTS_PREV = "rp"
+EVENT_OPEN = "o"
+EVENT_SUB = "s"
+EVENT_UNSUB = "u"
+ADMIN_CREATE = "ac"
+ADMIN_IMAGE_SKIP = "ai"
+ADMIN_MANAGE = "am"
+ADMIN_DELETE = "ad"
+ADMIN_CONFIRM_DELETE = "ax"
+ADMIN_EDIT_DT = "ed"
+ADMIN_EDIT_TEXT = "et"
+ADMIN_EDIT_REMINDER = "er"
+ADMIN_EDIT_IMAGE = "ei"
+
+ARITY = {
+    MENU: 0,
+    NOOP: 0,
+    EVENTS: 0,
+    EVENTS_NEXT: 2,
+    EVENTS_PREV: 2,
+    MY_EVENTS: 0,
+    MY_EVENTS_NEXT: 2,
+    MY_EVENTS_PREV: 2,
+    EVENT_OPEN: 1,
+    EVENT_SUB: 1,
+    EVENT_UNSUB: 1,
+    ADMIN_CREATE: 0,
+    ADMIN_IMAGE_SKIP: 1,
+    ADMIN_MANAGE: 1,
+    ADMIN_DELETE: 1,
+    ADMIN_CONFIRM_DELETE: 1,
+    ADMIN_EDIT_DT: 1,
+    ADMIN_EDIT_TEXT: 1,
+    ADMIN_EDIT_REMINDER: 1,
+    ADMIN_EDIT_IMAGE: 1,
+}
+
+# Unsubscribing from the reminders list carries the page cursor so the list is redrawn in place.
+OPTIONAL_ARGS = {
+    EVENT_UNSUB: 2,
+}
+
+# Buttons sent before the compact codes keep working until their messages age out.
+LEGACY_PREFIXES = {
+    "menu": MENU,
+    "noop": NOOP,
+    "events:list": EVENTS,
+    "events:next": EVENTS_NEXT,
+    "events:prev": EVENTS_PREV,
+    "event:open": EVENT_OPEN,
+    "event:sub": EVENT_SUB,
+    "event:unsub": EVENT_UNSUB,
+    "admin:create": ADMIN_CREATE,
+    "admin:image_skip": ADMIN_IMAGE_SKIP,
+    "admin:manage": ADMIN_MANAGE,
+    "admin:delete": ADMIN_DELETE,
+    "admin:confirm_delete": ADMIN_CONFIRM_DELETE,
+    "admin:edit_dt": ADMIN_EDIT_DT,
+    "admin:edit_text": ADMIN_EDIT_TEXT,
+    "admin:edit_reminder": ADMIN_EDIT_REMINDER,
+    "admin:edit_image": ADMIN_EDIT_IMAGE,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Callback:
+    action: str
+    args: tuple[int, ...] = ()
+
+
+def _accepts(action: str, count: int) -> bool:
+    extra = OPTIONAL_ARGS.get(action)
+    return count == ARITY[action] or (extra is not None and count == ARITY[action] + extra)
+
+
+def encode(action: str, *args: int) -> str:
+    if not _accepts(action, len(args)):
+        raise ValueError(f"Callback {action!r} takes {ARITY[action]} arguments, got {len(args)}")
+    data = SEPARATOR.join((action, *map(str, args)))
+    if len(data.encode()) > MAX_CALLBACK_DATA:
+        raise ValueError(f"Callback data {data!r} exceeds {MAX_CALLBACK_DATA} bytes")
+    return data
+
+
+def decode(data: str | None) -> Callback | None:
+    if not data:
+        return None
+    parts = data.split(SEPARATOR)
+    action = parts[0]
+    fields = parts[1:]
+    if action not in ARITY:
+        action = LEGACY_PREFIXES.get(SEPARATOR.join(parts[:2]))
+        fields = parts[2:]
+        if action is None:
+            return None
+    if not _accepts(action, len(fields)):
+        return None
+    try:
+        args = tuple(int(field) for field in fields)
+    except ValueError:
+        return None
+    return Callback(action, args)
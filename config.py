@@ -9,6 +9,18 @@ class Config:
     admin_ids: set[int]
     db_path: str
     timezone: ZoneInfo
+    mode: str = "polling"
+    webhook_url: str | None = None
+    webhook_host: str = "0.0.0.0"
+    webhook_port: int = 8080
+    webhook_path: str = "/webhook"
+    webhook_secret: str | None = None
+    webhook_concurrency: int = 64
+    fsm_ttl: int = 24 * 60 * 60
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int | None = None
+    workers: int = 1
+    refill_interval: int = 60 * 60
 
 
 def _parse_admin_ids(raw: str | None) -> set[int]:
@@ -30,4 +42,30 @@ def load_config() -> Config:
     admin_ids = _parse_admin_ids(os.getenv("ADMIN_IDS"))
     db_path = os.getenv("DB_PATH", "/data/events.db")
     timezone = ZoneInfo("Europe/Moscow")
-    return Config(token=token, admin_ids=admin_ids, db_path=db_path, timezone=timezone)
+    mode = os.getenv("BOT_MODE", "polling")
+    if mode not in ("polling", "webhook"):
+        raise RuntimeError("BOT_MODE must be 'polling' or 'webhook'")
+    workers = int(os.getenv("WORKERS", "1"))
+    if workers < 1:
+        raise RuntimeError("WORKERS must be at least 1")
+    if workers > 1 and mode != "webhook":
+        raise RuntimeError("WORKERS > 1 requires BOT_MODE=webhook, polling cannot be shared")
+    default_refill = 60 * 60 if workers == 1 else 30
+    return Config(
+        token=token,
+        admin_ids=admin_ids,
+        db_path=db_path,
+        timezone=timezone,
+        mode=mode,
+        webhook_url=os.getenv("WEBHOOK_URL") or None,
+        webhook_host=os.getenv("WEBHOOK_HOST", "0.0.0.0"),
+        webhook_port=int(os.getenv("WEBHOOK_PORT", "8080")),
+        webhook_path=os.getenv("WEBHOOK_PATH", "/webhook"),
+        webhook_secret=os.getenv("WEBHOOK_SECRET") or None,
+        webhook_concurrency=int(os.getenv("WEBHOOK_CONCURRENCY", "64")),
+        fsm_ttl=int(os.getenv("FSM_TTL", str(24 * 60 * 60))),
+        metrics_host=os.getenv("METRICS_HOST", "127.0.0.1"),
+        metrics_port=int(os.getenv("METRICS_PORT")) if os.getenv("METRICS_PORT") else None,
+        workers=workers,
+        refill_interval=int(os.getenv("REFILL_INTERVAL", str(default_refill))),
+    )
@@ -1,68 +1,665 @@
+import asyncio
+import json
+import logging
+import re
 import sqlite3
-from dataclasses import dataclass
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, tzinfo
+from typing import AsyncIterator, Callable, TypeVar
 
+from cache import TTLCache
+from writebehind import FLUSH_BATCH, FLUSH_INTERVAL, Batch, SubscriptionQueue
 
-@dataclass(frozen=True)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+MAX_ROWID = 2**63 - 1
+READER_POOL_SIZE = 4
+EVENT_CACHE_SIZE = 1024
+EVENT_CACHE_TTL = 300.0
+BUSY_TIMEOUT_MS = 5000
+STREAM_BATCH = 500
+VACUUM_PAGES = 2000
+MISSED_REMINDERS_WATERMARK = "missed_reminders"
+SEARCH_CACHE_SIZE = 512
+SEARCH_CACHE_TTL = 60.0
+MAX_SEARCH_TERMS = 8
+
+
+@dataclass(frozen=True, slots=True)
 class Event:
     id: int
-    start_at: datetime
+    start_ts: int
     text: str
     image_file_id: str | None
     reminder_minutes: int
+    version: int = 1
+    timezone: tzinfo | None = field(default=None, repr=False, compare=False)
+    _start_at: datetime | None = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def start_at(self) -> datetime:
+        if self._start_at is None:
+            object.__setattr__(self, "_start_at", datetime.fromtimestamp(self.start_ts, self.timezone))
+        return self._start_at
+
+    @property
+    def remind_at(self) -> int:
+        return self.start_ts - self.reminder_minutes * 60
+
+
+@dataclass(frozen=True)
+class EventPage:
+    events: list[Event]
+    has_prev: bool
+    has_next: bool
+
+
+@dataclass(frozen=True)
+class ReminderRun:
+    id: int
+    event_id: int
+    remind_at: int
+    finished: bool
+
+
+DELIVERY_PENDING = 0
+DELIVERY_CLAIMED = 1
+DELIVERY_SENT = 2
+DELIVERY_FAILED = 3
+DELIVERY_PRUNED = 4
+DELIVERY_IN_DOUBT = 5
+
+
+SQL_LIST_FUTURE_EVENTS = """
+    SELECT * FROM events
+    WHERE start_at > ?
+    ORDER BY start_at
+"""
+SQL_EVENTS_PAGE_AFTER = """
+    SELECT * FROM events
+    WHERE start_at > ? AND (start_at, id) > (?, ?)
+    ORDER BY start_at, id
+    LIMIT ?
+"""
+SQL_EVENTS_PAGE_BEFORE = """
+    SELECT * FROM events
+    WHERE start_at > ? AND (start_at, id) < (?, ?)
+    ORDER BY start_at DESC, id DESC
+    LIMIT ?
+"""
+SQL_USER_EVENTS_PAGE_AFTER = """
+    SELECT events.* FROM subscriptions
+    JOIN events ON events.id = subscriptions.event_id
+    WHERE subscriptions.user_id = ? AND events.start_at > ? AND (events.start_at, events.id) > (?, ?)
+    ORDER BY events.start_at, events.id
+    LIMIT ?
+"""
+SQL_USER_EVENTS_PAGE_BEFORE = """
+    SELECT events.* FROM subscriptions
+    JOIN events ON events.id = subscriptions.event_id
+    WHERE subscriptions.user_id = ? AND events.start_at > ? AND (events.start_at, events.id) < (?, ?)
+    ORDER BY events.start_at DESC, events.id DESC
+    LIMIT ?
+"""
+SQL_SEARCH_EVENTS = """
+    SELECT events.* FROM events_fts
+    JOIN events ON events.id = events_fts.rowid
+    WHERE events_fts MATCH ? AND events.start_at > ?
+    ORDER BY events_fts.rank
+    LIMIT ?
+"""
+SQL_LIST_DUE_REMINDERS = """
+    SELECT id, start_at - reminder_minutes * 60 AS remind_at, subscriber_count FROM events
+    WHERE start_at - reminder_minutes * 60 > ? AND start_at - reminder_minutes * 60 <= ?
+"""
+SQL_LIST_MISSED_REMINDERS = """
+    SELECT id, start_at - reminder_minutes * 60 AS remind_at FROM events
+    WHERE start_at - reminder_minutes * 60 > ? AND start_at - reminder_minutes * 60 <= ?
+        AND +start_at > ?
+        AND NOT EXISTS (
+            SELECT 1 FROM reminder_runs
+            WHERE reminder_runs.event_id = events.id
+                AND reminder_runs.remind_at = events.start_at - events.reminder_minutes * 60
+        )
+"""
+SQL_CLAIM_DELIVERIES = """
+    SELECT user_id FROM deliveries
+    WHERE run_id = ? AND user_id > ? AND status = ?
+    ORDER BY user_id
+    LIMIT ?
+"""
+SQL_COUNT_SUBSCRIPTIONS = "SELECT subscriber_count FROM events WHERE id = ?"
+SQL_RECOUNT_SUBSCRIPTIONS = """
+    UPDATE events SET subscriber_count = (
+        SELECT COUNT(*) FROM subscriptions WHERE subscriptions.event_id = events.id
+    )
+"""
+SQL_ENQUEUE_DELIVERIES = """
+    INSERT INTO deliveries (run_id, user_id)
+    SELECT ?, user_id FROM subscriptions
+    WHERE event_id = ?
+        AND NOT EXISTS (SELECT 1 FROM blocked_chats WHERE blocked_chats.user_id = subscriptions.user_id)
+"""
+SQL_PRUNE_BLOCKED_SUBSCRIPTIONS = """
+    DELETE FROM subscriptions WHERE user_id IN (SELECT value FROM json_each(?))
+"""
+SQL_LIST_USER_SUBSCRIPTIONS = "SELECT event_id FROM subscriptions WHERE user_id = ?"
+SQL_LIST_ARCHIVABLE_EVENTS = "SELECT id FROM events WHERE start_at < ? ORDER BY start_at LIMIT ?"
+SQL_ARCHIVE_EVENTS = """
+    INSERT OR REPLACE INTO events_archive (
+        id, start_at, text, image_file_id, reminder_minutes,
+        subscriber_count, delivered, failed, pruned, archived_at
+    )
+    SELECT
+        e.id, e.start_at, e.text, e.image_file_id, e.reminder_minutes, e.subscriber_count,
+        COUNT(CASE WHEN d.status = ? THEN 1 END),
+        COUNT(CASE WHEN d.status = ? THEN 1 END),
+        COUNT(CASE WHEN d.status = ? THEN 1 END),
+        ?
+    FROM events AS e
+    LEFT JOIN reminder_runs AS r ON r.event_id = e.id
+    LEFT JOIN deliveries AS d ON d.run_id = r.id
+    WHERE e.id IN (SELECT value FROM json_each(?))
+    GROUP BY e.id
+"""
+
+EXPECTED_QUERY_PLANS = {
+    "list_future_events": (SQL_LIST_FUTURE_EVENTS, (0,), "idx_events_start_at"),
+    "events_page_after": (SQL_EVENTS_PAGE_AFTER, (0, 0, 0, 1), "idx_events_start_at"),
+    "events_page_before": (SQL_EVENTS_PAGE_BEFORE, (0, 0, 0, 1), "idx_events_start_at"),
+    "user_events_page_after": (SQL_USER_EVENTS_PAGE_AFTER, (0, 0, 0, 0, 1), "idx_subscriptions_user_id"),
+    "user_events_page_before": (SQL_USER_EVENTS_PAGE_BEFORE, (0, 0, 0, 0, 1), "idx_subscriptions_user_id"),
+    "search_events": (SQL_SEARCH_EVENTS, ('"a"*', 0, 1), "VIRTUAL TABLE INDEX"),
+    "list_due_reminders": (SQL_LIST_DUE_REMINDERS, (0, 1), "idx_events_remind_at"),
+    "list_missed_reminders": (SQL_LIST_MISSED_REMINDERS, (0, 0, 0), "idx_events_remind_at"),
+    "claim_deliveries": (SQL_CLAIM_DELIVERIES, (0, 0, 0, 1), "PRIMARY KEY"),
+    "count_subscriptions": (SQL_COUNT_SUBSCRIPTIONS, (0,), "INTEGER PRIMARY KEY"),
+    "enqueue_deliveries": (SQL_ENQUEUE_DELIVERIES, (0, 0), "PRIMARY KEY"),
+    "prune_blocked_subscriptions": (SQL_PRUNE_BLOCKED_SUBSCRIPTIONS, ("[]",), "idx_subscriptions_user_id"),
+    "list_archivable_events": (SQL_LIST_ARCHIVABLE_EVENTS, (0, 1), "idx_events_start_at"),
+    "list_user_subscriptions": (SQL_LIST_USER_SUBSCRIPTIONS, (0,), "idx_subscriptions_user_id"),
+}
+
+
+def to_epoch(value: datetime) -> int:
+    return int(value.timestamp())
+
+
+def event_cursor(event: Event) -> tuple[int, int]:
+    return event.start_ts, event.id
+
+
+def search_expression(query: str) -> str | None:
+    terms = re.findall(r"\w+", query.lower())[:MAX_SEARCH_TERMS]
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _migrate_initial_schema(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            start_at TEXT NOT NULL,
+            text TEXT NOT NULL,
+            image_file_id TEXT,
+            reminder_minutes INTEGER NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS subscriptions (
+            user_id INTEGER NOT NULL,
+            event_id INTEGER NOT NULL,
+            subscribed_at TEXT NOT NULL,
+            PRIMARY KEY (user_id, event_id),
+            FOREIGN KEY (event_id) REFERENCES events (id)
+        )
+        """
+    )
+
+
+def _migrate_epoch_timestamps(conn: sqlite3.Connection) -> None:
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'events'").fetchone()
+    events_seq = row["seq"] if row else 0
+    conn.execute(
+        """
+        CREATE TABLE events_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            start_at INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            image_file_id TEXT,
+            reminder_minutes INTEGER NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO events_new (id, start_at, text, image_file_id, reminder_minutes)
+        SELECT id, iso_to_epoch(start_at), text, image_file_id, reminder_minutes
+        FROM events
+        """
+    )
+    conn.execute("DROP TABLE events")
+    conn.execute("ALTER TABLE events_new RENAME TO events")
+    conn.execute(
+        "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'events'",
+        (events_seq,),
+    )
+    conn.execute("CREATE INDEX idx_events_start_at ON events (start_at)")
+    conn.execute(
+        """
+        CREATE TABLE subscriptions_new (
+            user_id INTEGER NOT NULL,
+            event_id INTEGER NOT NULL,
+            subscribed_at INTEGER NOT NULL,
+            PRIMARY KEY (event_id, user_id),
+            FOREIGN KEY (event_id) REFERENCES events (id)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO subscriptions_new (user_id, event_id, subscribed_at)
+        SELECT user_id, event_id, iso_to_epoch(subscribed_at)
+        FROM subscriptions
+        """
+    )
+    conn.execute("DROP TABLE subscriptions")
+    conn.execute("ALTER TABLE subscriptions_new RENAME TO subscriptions")
+    conn.execute("CREATE INDEX idx_subscriptions_user_id ON subscriptions (user_id)")
+
+
+def _migrate_subscriber_counts(conn: sqlite3.Connection) -> None:
+    conn.execute("ALTER TABLE events ADD COLUMN subscriber_count INTEGER NOT NULL DEFAULT 0")
+    conn.execute(
+        """
+        CREATE TRIGGER subscriptions_count_insert AFTER INSERT ON subscriptions
+        BEGIN
+            UPDATE events SET subscriber_count = subscriber_count + 1 WHERE id = NEW.event_id;
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER subscriptions_count_delete AFTER DELETE ON subscriptions
+        BEGIN
+            UPDATE events SET subscriber_count = subscriber_count - 1 WHERE id = OLD.event_id;
+        END
+        """
+    )
+    conn.execute(SQL_RECOUNT_SUBSCRIPTIONS)
+
+
+def _migrate_fsm_states(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE fsm_states (
+            chat_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            state TEXT,
+            data TEXT,
+            updated_at INTEGER NOT NULL,
+            PRIMARY KEY (chat_id, user_id)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute("CREATE INDEX idx_fsm_states_updated_at ON fsm_states (updated_at)")
+
+
+def _migrate_reminder_time_index(conn: sqlite3.Connection) -> None:
+    conn.execute("CREATE INDEX idx_events_remind_at ON events (start_at - reminder_minutes * 60)")
+
+
+def _migrate_delivery_outbox(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE reminder_runs (
+            id INTEGER PRIMARY KEY,
+            event_id INTEGER NOT NULL,
+            remind_at INTEGER NOT NULL,
+            started_at INTEGER NOT NULL,
+            finished_at INTEGER,
+            UNIQUE (event_id, remind_at)
+        )
+        """
+    )
+    conn.execute(
+        "CREATE INDEX idx_reminder_runs_unfinished ON reminder_runs (id) WHERE finished_at IS NULL"
+    )
+    conn.execute(
+        """
+        CREATE TABLE deliveries (
+            run_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            status INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (run_id, user_id)
+        ) WITHOUT ROWID
+        """
+    )
+    # Reminders already sent by the old per-event jobs must not look missed to the outbox.
+    conn.execute(
+        """
+        INSERT INTO reminder_runs (event_id, remind_at, started_at, finished_at)
+        SELECT id, start_at - reminder_minutes * 60, :now, :now FROM events
+        WHERE start_at > :now AND start_at - reminder_minutes * 60 <= :now
+        """,
+        {"now": int(time.time())},
+    )
+
+
+def _migrate_run_deadline_miss(conn: sqlite3.Connection) -> None:
+    conn.execute("ALTER TABLE reminder_runs ADD COLUMN deadline_miss REAL")
+
+
+def _migrate_blocked_chats(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE blocked_chats (
+            user_id INTEGER PRIMARY KEY,
+            blocked_at INTEGER NOT NULL
+        )
+        """
+    )
+
+
+def _migrate_event_version(conn: sqlite3.Connection) -> None:
+    conn.execute("ALTER TABLE events ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+
+def _migrate_leases(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def _migrate_events_archive(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE events_archive (
+            id INTEGER PRIMARY KEY,
+            start_at INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            image_file_id TEXT,
+            reminder_minutes INTEGER NOT NULL,
+            subscriber_count INTEGER NOT NULL,
+            delivered INTEGER NOT NULL,
+            failed INTEGER NOT NULL,
+            pruned INTEGER NOT NULL,
+            archived_at INTEGER NOT NULL
+        )
+        """
+    )
+
+
+def _migrate_events_fts(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE events_fts USING fts5(
+            text,
+            content = 'events',
+            content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER events_fts_insert AFTER INSERT ON events BEGIN
+            INSERT INTO events_fts (rowid, text) VALUES (new.id, new.text);
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER events_fts_delete AFTER DELETE ON events BEGIN
+            INSERT INTO events_fts (events_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        END
+        """
+    )
+    conn.execute(
+        """
+        CREATE TRIGGER events_fts_update AFTER UPDATE OF text ON events BEGIN
+            INSERT INTO events_fts (events_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            INSERT INTO events_fts (rowid, text) VALUES (new.id, new.text);
+        END
+        """
+    )
+    conn.execute("INSERT INTO events_fts (events_fts) VALUES ('rebuild')")
+
+
+def _migrate_watermarks(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE watermarks (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+
+
+MIGRATIONS: list[Callable[[sqlite3.Connection], None]] = [
+    _migrate_initial_schema,
+    _migrate_epoch_timestamps,
+    _migrate_subscriber_counts,
+    _migrate_fsm_states,
+    _migrate_reminder_time_index,
+    _migrate_delivery_outbox,
+    _migrate_run_deadline_miss,
+    _migrate_blocked_chats,
+    _migrate_event_version,
+    _migrate_leases,
+    _migrate_events_archive,
+    _migrate_events_fts,
+    _migrate_watermarks,
+]
 
 
 class Database:
-    def __init__(self, path: str):
-        self._db = sqlite3.connect(path, check_same_thread=False)
-        self._db.row_factory = sqlite3.Row
-        self._ensure_schema()
-
-    def _ensure_schema(self) -> None:
-        cur = self._db.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                start_at TEXT NOT NULL,
-                text TEXT NOT NULL,
-                image_file_id TEXT,
-                reminder_minutes INTEGER NOT NULL
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS subscriptions (
-                user_id INTEGER NOT NULL,
-                event_id INTEGER NOT NULL,
-                subscribed_at TEXT NOT NULL,
-                PRIMARY KEY (user_id, event_id),
-                FOREIGN KEY (event_id) REFERENCES events (id)
-            )
-            """
-        )
-        self._db.commit()
-
-    def create_event(
+    def __init__(
+        self,
+        path: str,
+        timezone: tzinfo,
+        readers: int = READER_POOL_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        flush_batch: int = FLUSH_BATCH,
+        cache_size: int = EVENT_CACHE_SIZE,
+        cache_ttl: float = EVENT_CACHE_TTL,
+    ):
+        self._path = path
+        self._timezone = timezone
+        self._events: TTLCache[int, Event] = TTLCache(cache_size, cache_ttl)
+        self._counts: TTLCache[int, int] = TTLCache(cache_size, cache_ttl)
+        self._searches: TTLCache[tuple[str, int], list[Event]] = TTLCache(
+            SEARCH_CACHE_SIZE, min(cache_ttl, SEARCH_CACHE_TTL)
+        )
+        self._change_listeners: list[Callable[[int], None]] = []
+        self._subscriptions = SubscriptionQueue(self._apply_subscriptions, flush_interval, flush_batch)
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="db-writer",
+            initializer=self._open_connection,
+            initargs=(False,),
+        )
+        self._readers = ThreadPoolExecutor(
+            max_workers=readers,
+            thread_name_prefix="db-reader",
+            initializer=self._open_connection,
+            initargs=(True,),
+        )
+        self._writer.submit(self._run, self._migrate).result()
+        self._writer.submit(self._run, self._enable_incremental_vacuum).result()
+        for problem in self._writer.submit(self._run, self.check_query_plans).result():
+            logger.warning("Query plan check: %s", problem)
+
+    def _open_connection(self, read_only: bool) -> None:
+        conn = sqlite3.connect(self._path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+        if read_only:
+            conn.execute("PRAGMA query_only = ON")
+        else:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        self._local.conn = conn
+        with self._connections_lock:
+            self._connections.append(conn)
+
+    def _run(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        return fn(self._local.conn)
+
+    def _run_write(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        conn = self._local.conn
+        conn.execute("BEGIN IMMEDIATE")
+        with conn:
+            return fn(conn)
+
+    async def _read(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, self._run, fn)
+
+    async def _write(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, self._run_write, fn)
+
+    async def close(self) -> None:
+        await self._subscriptions.flush()
+        logger.info("Database cache stats: %s", self.cache_stats())
+        self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+    def add_change_listener(self, listener: Callable[[int], None]) -> None:
+        self._change_listeners.append(listener)
+
+    def _notify_changed(self, event_id: int) -> None:
+        for listener in self._change_listeners:
+            listener(event_id)
+
+    def _iso_to_epoch(self, value: str | None) -> int | None:
+        if value is None:
+            return None
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=self._timezone)
+        return to_epoch(parsed)
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        conn.create_function("iso_to_epoch", 1, self._iso_to_epoch, deterministic=True)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number in range(version + 1, len(MIGRATIONS) + 1):
+            conn.execute("BEGIN IMMEDIATE")
+            # Another worker may have applied this step while we waited for the write lock.
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= number:
+                conn.commit()
+                continue
+            try:
+                MIGRATIONS[number - 1](conn)
+                conn.execute(f"PRAGMA user_version = {number}")
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+            logger.info("Database migrated to version %s", number)
+
+    def _enable_incremental_vacuum(self, conn: sqlite3.Connection) -> None:
+        # The switch needs a full VACUUM, which holds the write lock; do it before any updates are served.
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return
+        logger.info("Switching the database to incremental auto-vacuum")
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        try:
+            conn.execute("VACUUM")
+        except sqlite3.OperationalError:
+            logger.warning("Could not vacuum the database, incremental auto-vacuum stays off until next start")
+
+    def check_query_plans(self, conn: sqlite3.Connection) -> list[str]:
+        # EXPLAIN does not check the schema cookie, so reload a schema another worker may have migrated.
+        conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+        problems = []
+        for name, (query, params, expected) in EXPECTED_QUERY_PLANS.items():
+            plan = " | ".join(
+                row["detail"] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)
+            )
+            if expected not in plan:
+                problems.append(f"{name} does not use {expected}: {plan}")
+        return problems
+
+    def _row_to_event(self, row: sqlite3.Row) -> Event:
+        return Event(
+            id=row["id"],
+            start_ts=row["start_at"],
+            text=row["text"],
+            image_file_id=row["image_file_id"],
+            reminder_minutes=row["reminder_minutes"],
+            version=row["version"],
+            timezone=self._timezone,
+        )
+
+    async def create_event(
         self,
         start_at: datetime,
         text: str,
         reminder_minutes: int,
         image_file_id: str | None = None,
     ) -> int:
-        cur = self._db.cursor()
-        cur.execute(
-            """
-            INSERT INTO events (start_at, text, image_file_id, reminder_minutes)
-            VALUES (?, ?, ?, ?)
-            """,
-            (start_at.isoformat(), text, image_file_id, reminder_minutes),
-        )
-        self._db.commit()
-        return int(cur.lastrowid)
-
-    def update_event(
+        def insert(conn: sqlite3.Connection) -> int:
+            cur = conn.execute(
+                """
+                INSERT INTO events (start_at, text, image_file_id, reminder_minutes)
+                VALUES (?, ?, ?, ?)
+                """,
+                (to_epoch(start_at), text, image_file_id, reminder_minutes),
+            )
+            return int(cur.lastrowid)
+
+        event_id = await self._write(insert)
+        self._searches.clear()
+        return event_id
+
+    async def create_events(self, rows: list[tuple[datetime, str, int, str | None]]) -> list[int]:
+        def insert(conn: sqlite3.Connection) -> list[int]:
+            conn.executemany(
+                """
+                INSERT INTO events (start_at, text, reminder_minutes, image_file_id)
+                VALUES (?, ?, ?, ?)
+                """,
+                [
+                    (to_epoch(start_at), text, reminder_minutes, image_file_id)
+                    for start_at, text, reminder_minutes, image_file_id in rows
+                ],
+            )
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            return list(range(last_id - len(rows) + 1, last_id + 1))
+
+        if not rows:
+            return []
+        event_ids = await self._write(insert)
+        self._searches.clear()
+        return event_ids
+
+    async def update_event(
         self,
         event_id: int,
         *,
@@ -75,7 +672,7 @@ class Database:
         values: list[object] = []
         if start_at is not None:
             fields.append("start_at = ?")
-            values.append(start_at.isoformat())
+            values.append(to_epoch(start_at))
         if text is not None:
             fields.append("text = ?")
             values.append(text)
@@ -88,92 +685,482 @@ class Database:
         if not fields:
             return
         values.append(event_id)
+        fields.append("version = version + 1")
         query = f"UPDATE events SET {', '.join(fields)} WHERE id = ?"
-        cur = self._db.cursor()
-        cur.execute(query, values)
-        self._db.commit()
-
-    def delete_event(self, event_id: int) -> None:
-        cur = self._db.cursor()
-        cur.execute("DELETE FROM subscriptions WHERE event_id = ?", (event_id,))
-        cur.execute("DELETE FROM events WHERE id = ?", (event_id,))
-        self._db.commit()
-
-    def get_event(self, event_id: int) -> Event | None:
-        cur = self._db.cursor()
-        cur.execute("SELECT * FROM events WHERE id = ?", (event_id,))
-        row = cur.fetchone()
-        if not row:
-            return None
-        return Event(
-            id=row["id"],
-            start_at=datetime.fromisoformat(row["start_at"]),
-            text=row["text"],
-            image_file_id=row["image_file_id"],
-            reminder_minutes=row["reminder_minutes"],
+        await self._write(lambda conn: conn.execute(query, values))
+        self._events.pop(event_id)
+        self._searches.clear()
+        self._notify_changed(event_id)
+
+    async def delete_event(self, event_id: int) -> None:
+        await self._subscriptions.flush()
+
+        def delete(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM subscriptions WHERE event_id = ?", (event_id,))
+            conn.execute("DELETE FROM events WHERE id = ?", (event_id,))
+
+        await self._write(delete)
+        self._events.pop(event_id)
+        self._counts.pop(event_id)
+        self._searches.clear()
+        self._notify_changed(event_id)
+
+    async def get_event(self, event_id: int) -> Event | None:
+        event = self._events.get(event_id)
+        if event is not None:
+            return event
+
+        def select(conn: sqlite3.Connection) -> Event | None:
+            row = conn.execute("SELECT * FROM events WHERE id = ?", (event_id,)).fetchone()
+            return self._row_to_event(row) if row else None
+
+        version = self._events.version
+        event = await self._read(select)
+        if event is not None:
+            self._events.set(event_id, event, version)
+        return event
+
+    async def list_future_events(self, now: datetime) -> list[Event]:
+        def select(conn: sqlite3.Connection) -> list[Event]:
+            cur = conn.execute(SQL_LIST_FUTURE_EVENTS, (to_epoch(now),))
+            return [self._row_to_event(row) for row in cur.fetchall()]
+
+        return await self._read(select)
+
+    async def list_events_page(
+        self,
+        now: datetime,
+        limit: int,
+        *,
+        after: tuple[int, int] | None = None,
+        before: tuple[int, int] | None = None,
+    ) -> EventPage:
+        return await self._read(
+            lambda conn: self._select_page(
+                conn, SQL_EVENTS_PAGE_AFTER, SQL_EVENTS_PAGE_BEFORE, (), now, limit, after, before
+            )
+        )
+
+    async def list_user_events_page(
+        self,
+        user_id: int,
+        now: datetime,
+        limit: int,
+        *,
+        after: tuple[int, int] | None = None,
+        before: tuple[int, int] | None = None,
+    ) -> EventPage:
+        await self._subscriptions.flush()
+        return await self._read(
+            lambda conn: self._select_page(
+                conn, SQL_USER_EVENTS_PAGE_AFTER, SQL_USER_EVENTS_PAGE_BEFORE, (user_id,), now, limit, after, before
+            )
+        )
+
+    def _select_page(
+        self,
+        conn: sqlite3.Connection,
+        query_after: str,
+        query_before: str,
+        params: tuple[int, ...],
+        now: datetime,
+        limit: int,
+        after: tuple[int, int] | None,
+        before: tuple[int, int] | None,
+    ) -> EventPage:
+        if before is not None:
+            rows = conn.execute(query_before, (*params, to_epoch(now), *before, limit + 1)).fetchall()
+            events = [self._row_to_event(row) for row in reversed(rows[:limit])]
+            return EventPage(events, has_prev=len(rows) > limit, has_next=True)
+        cursor = after if after is not None else (to_epoch(now), MAX_ROWID)
+        rows = conn.execute(query_after, (*params, to_epoch(now), *cursor, limit + 1)).fetchall()
+        events = [self._row_to_event(row) for row in rows[:limit]]
+        return EventPage(events, has_prev=after is not None, has_next=len(rows) > limit)
+
+    async def iter_future_events(self, now: datetime, batch_size: int = STREAM_BATCH) -> AsyncIterator[Event]:
+        cursor = (to_epoch(now), MAX_ROWID)
+        while True:
+            def select(conn: sqlite3.Connection, cursor: tuple[int, int] = cursor) -> list[Event]:
+                rows = conn.execute(SQL_EVENTS_PAGE_AFTER, (to_epoch(now), *cursor, batch_size)).fetchall()
+                return [self._row_to_event(row) for row in rows]
+
+            events = await self._read(select)
+            for event in events:
+                yield event
+            if len(events) < batch_size:
+                return
+            cursor = event_cursor(events[-1])
+
+    async def search_events(self, query: str, now: datetime, limit: int) -> list[Event]:
+        expression = search_expression(query)
+        if expression is None:
+            return []
+        key = (expression, limit)
+        events = self._searches.get(key)
+        if events is None:
+            version = self._searches.version
+
+            def select(conn: sqlite3.Connection) -> list[Event]:
+                cur = conn.execute(SQL_SEARCH_EVENTS, (expression, to_epoch(now), limit))
+                return [self._row_to_event(row) for row in cur.fetchall()]
+
+            events = await self._read(select)
+            self._searches.set(key, events, version)
+        start_ts = to_epoch(now)
+        return [event for event in events if event.start_ts > start_ts]
+
+    async def list_due_reminders(self, after: datetime, until: datetime) -> list[tuple[int, int, int]]:
+        def select(conn: sqlite3.Connection) -> list[tuple[int, int, int]]:
+            cur = conn.execute(SQL_LIST_DUE_REMINDERS, (to_epoch(after), to_epoch(until)))
+            return [(row["id"], row["remind_at"], row["subscriber_count"]) for row in cur.fetchall()]
+
+        return await self._read(select)
+
+    async def collect_missed_reminders(self, now: datetime) -> list[tuple[int, int]]:
+        def collect(conn: sqlite3.Connection) -> list[tuple[int, int]]:
+            row = conn.execute(
+                "SELECT value FROM watermarks WHERE name = ?",
+                (MISSED_REMINDERS_WATERMARK,),
+            ).fetchone()
+            since = row["value"] if row else 0
+            cur = conn.execute(SQL_LIST_MISSED_REMINDERS, (since, to_epoch(now), to_epoch(now)))
+            missed = [(row["id"], row["remind_at"]) for row in cur.fetchall()]
+            # Stay behind reminders that have no run yet, so a crash before they start cannot skip them.
+            checked = min((remind_at - 1 for _, remind_at in missed), default=to_epoch(now))
+            conn.execute(
+                """
+                INSERT INTO watermarks (name, value) VALUES (?, ?)
+                ON CONFLICT (name) DO UPDATE SET value = excluded.value
+                """,
+                (MISSED_REMINDERS_WATERMARK, checked),
+            )
+            return missed
+
+        return await self._write(collect)
+
+    async def rewind_missed_reminders(self, remind_at: int) -> None:
+        await self._write(
+            lambda conn: conn.execute(
+                "UPDATE watermarks SET value = MIN(value, ?) WHERE name = ?",
+                (remind_at - 1, MISSED_REMINDERS_WATERMARK),
+            )
         )
 
-    def list_future_events(self, now: datetime) -> list[Event]:
-        cur = self._db.cursor()
-        cur.execute(
-            """
-            SELECT * FROM events
-            WHERE start_at > ?
-            ORDER BY start_at
-            """,
-            (now.isoformat(),),
-        )
-        return [
-            Event(
-                id=row["id"],
-                start_at=datetime.fromisoformat(row["start_at"]),
-                text=row["text"],
-                image_file_id=row["image_file_id"],
-                reminder_minutes=row["reminder_minutes"],
-            )
-            for row in cur.fetchall()
+    async def start_reminder_run(self, event_id: int, remind_at: int, now: datetime) -> ReminderRun:
+        await self._subscriptions.flush()
+
+        def start(conn: sqlite3.Connection) -> ReminderRun:
+            cur = conn.execute(
+                """
+                INSERT OR IGNORE INTO reminder_runs (event_id, remind_at, started_at)
+                VALUES (?, ?, ?)
+                """,
+                (event_id, remind_at, to_epoch(now)),
+            )
+            if cur.rowcount:
+                run_id = int(cur.lastrowid)
+                conn.execute(SQL_ENQUEUE_DELIVERIES, (run_id, event_id))
+                return ReminderRun(run_id, event_id, remind_at, finished=False)
+            row = conn.execute(
+                "SELECT id, finished_at FROM reminder_runs WHERE event_id = ? AND remind_at = ?",
+                (event_id, remind_at),
+            ).fetchone()
+            return ReminderRun(row["id"], event_id, remind_at, finished=row["finished_at"] is not None)
+
+        return await self._write(start)
+
+    async def recover_reminder_runs(self) -> list[ReminderRun]:
+        def recover(conn: sqlite3.Connection) -> list[ReminderRun]:
+            rows = conn.execute(
+                "SELECT id, event_id, remind_at FROM reminder_runs WHERE finished_at IS NULL"
+            ).fetchall()
+            conn.executemany(
+                "UPDATE deliveries SET status = ? WHERE run_id = ? AND status = ?",
+                [(DELIVERY_IN_DOUBT, row["id"], DELIVERY_CLAIMED) for row in rows],
+            )
+            return [
+                ReminderRun(row["id"], row["event_id"], row["remind_at"], finished=False)
+                for row in rows
+            ]
+
+        return await self._write(recover)
+
+    async def claim_deliveries(self, run_id: int, after_user_id: int, limit: int) -> list[int]:
+        def claim(conn: sqlite3.Connection) -> list[int]:
+            user_ids = [
+                row["user_id"]
+                for row in conn.execute(
+                    SQL_CLAIM_DELIVERIES,
+                    (run_id, after_user_id, DELIVERY_PENDING, limit),
+                )
+            ]
+            conn.executemany(
+                "UPDATE deliveries SET status = ? WHERE run_id = ? AND user_id = ?",
+                [(DELIVERY_CLAIMED, run_id, user_id) for user_id in user_ids],
+            )
+            return user_ids
+
+        return await self._write(claim)
+
+    async def mark_deliveries(self, run_id: int, outcomes: list[tuple[int, int]]) -> None:
+        await self._write(
+            lambda conn: conn.executemany(
+                "UPDATE deliveries SET status = ? WHERE run_id = ? AND user_id = ?",
+                [(status, run_id, user_id) for user_id, status in outcomes],
+            )
+        )
+
+    async def finish_reminder_run(
+        self,
+        run_id: int,
+        now: datetime,
+        deadline_miss: float | None = None,
+    ) -> dict[int, int]:
+        def finish(conn: sqlite3.Connection) -> dict[int, int]:
+            conn.execute(
+                "UPDATE reminder_runs SET finished_at = ?, deadline_miss = ? WHERE id = ?",
+                (to_epoch(now), deadline_miss, run_id),
+            )
+            cur = conn.execute(
+                "SELECT status, COUNT(*) AS cnt FROM deliveries WHERE run_id = ? GROUP BY status",
+                (run_id,),
+            )
+            return {row["status"]: row["cnt"] for row in cur.fetchall()}
+
+        return await self._write(finish)
+
+    async def count_subscriptions(self, event_id: int) -> int:
+        def select(conn: sqlite3.Connection) -> int:
+            row = conn.execute(SQL_COUNT_SUBSCRIPTIONS, (event_id,)).fetchone()
+            return int(row["subscriber_count"]) if row else 0
+
+        count = self._counts.get(event_id)
+        if count is None:
+            version = self._counts.version
+            count = await self._read(select)
+            self._counts.set(event_id, count, version)
+        return count + self._subscriptions.count_delta(event_id)
+
+    async def is_subscribed(self, user_id: int, event_id: int) -> bool:
+        pending = self._subscriptions.state(user_id, event_id)
+        if pending is not None:
+            return pending
+        return await self._is_subscribed_stored(user_id, event_id)
+
+    async def _is_subscribed_stored(self, user_id: int, event_id: int) -> bool:
+        def select(conn: sqlite3.Connection) -> bool:
+            row = conn.execute(
+                "SELECT 1 FROM subscriptions WHERE user_id = ? AND event_id = ?",
+                (user_id, event_id),
+            ).fetchone()
+            return row is not None
+
+        return await self._read(select)
+
+    async def add_subscription(self, user_id: int, event_id: int, now: datetime) -> None:
+        await self._queue_subscription(user_id, event_id, True, now)
+
+    async def remove_subscription(self, user_id: int, event_id: int) -> None:
+        await self._queue_subscription(user_id, event_id, False, datetime.now(self._timezone))
+
+    async def _queue_subscription(self, user_id: int, event_id: int, subscribed: bool, now: datetime) -> None:
+        was_subscribed = self._subscriptions.state(user_id, event_id)
+        if was_subscribed is None:
+            was_subscribed = await self._is_subscribed_stored(user_id, event_id)
+        self._subscriptions.put(user_id, event_id, subscribed, to_epoch(now), was_subscribed)
+
+    async def flush_subscriptions(self) -> None:
+        await self._subscriptions.flush()
+
+    async def _apply_subscriptions(self, batch: Batch) -> None:
+        added = [
+            (user_id, event_id, change.at)
+            for (user_id, event_id), change in batch.items()
+            if change.subscribed
         ]
+        removed = [
+            (user_id, event_id)
+            for (user_id, event_id), change in batch.items()
+            if not change.subscribed
+        ]
+
+        def apply(conn: sqlite3.Connection) -> None:
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO subscriptions (user_id, event_id, subscribed_at)
+                VALUES (?, ?, ?)
+                """,
+                added,
+            )
+            conn.executemany(
+                "DELETE FROM subscriptions WHERE user_id = ? AND event_id = ?",
+                removed,
+            )
+
+        await self._write(apply)
+        for (_, event_id), change in batch.items():
+            cached = self._counts.peek(event_id)
+            if cached is not None:
+                self._counts.update(event_id, cached + change.delta)
+            else:
+                self._counts.pop(event_id)
+
+    async def block_chats(self, user_ids: list[int], now: datetime) -> None:
+        if not user_ids:
+            return
+        await self._subscriptions.flush()
+
+        def block(conn: sqlite3.Connection) -> None:
+            conn.executemany(
+                "INSERT OR REPLACE INTO blocked_chats (user_id, blocked_at) VALUES (?, ?)",
+                [(user_id, to_epoch(now)) for user_id in user_ids],
+            )
+            conn.execute(SQL_PRUNE_BLOCKED_SUBSCRIPTIONS, (json.dumps(user_ids),))
+
+        await self._write(block)
+        self._counts.clear()
+
+    async def unblock_chat(self, user_id: int) -> None:
+        def select(conn: sqlite3.Connection) -> bool:
+            row = conn.execute("SELECT 1 FROM blocked_chats WHERE user_id = ?", (user_id,)).fetchone()
+            return row is not None
+
+        if not await self._read(select):
+            return
+        await self._write(
+            lambda conn: conn.execute("DELETE FROM blocked_chats WHERE user_id = ?", (user_id,))
+        )
+
+    async def acquire_lease(self, name: str, holder: str, now: datetime, ttl: int) -> bool:
+        def acquire(conn: sqlite3.Connection) -> bool:
+            cur = conn.execute(
+                """
+                INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT (name) DO UPDATE
+                SET holder = excluded.holder, expires_at = excluded.expires_at
+                WHERE leases.holder = excluded.holder OR leases.expires_at <= ?
+                """,
+                (name, holder, to_epoch(now) + ttl, to_epoch(now)),
+            )
+            return cur.rowcount > 0
+
+        return await self._write(acquire)
+
+    async def release_lease(self, name: str, holder: str) -> None:
+        def release(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (name, holder))
+
+        await self._write(release)
+
+    async def archive_events(self, before: datetime, limit: int, now: datetime) -> int:
+        await self._subscriptions.flush()
+
+        def archive(conn: sqlite3.Connection) -> list[int]:
+            event_ids = [
+                row["id"]
+                for row in conn.execute(SQL_LIST_ARCHIVABLE_EVENTS, (to_epoch(before), limit))
+            ]
+            if not event_ids:
+                return []
+            payload = json.dumps(event_ids)
+            conn.execute(
+                SQL_ARCHIVE_EVENTS,
+                (DELIVERY_SENT, DELIVERY_FAILED, DELIVERY_PRUNED, to_epoch(now), payload),
+            )
+            conn.execute(
+                """
+                DELETE FROM deliveries WHERE run_id IN (
+                    SELECT id FROM reminder_runs WHERE event_id IN (SELECT value FROM json_each(?))
+                )
+                """,
+                (payload,),
+            )
+            conn.execute(
+                "DELETE FROM reminder_runs WHERE event_id IN (SELECT value FROM json_each(?))",
+                (payload,),
+            )
+            conn.execute(
+                "DELETE FROM subscriptions WHERE event_id IN (SELECT value FROM json_each(?))",
+                (payload,),
+            )
+            conn.execute("DELETE FROM events WHERE id IN (SELECT value FROM json_each(?))", (payload,))
+            return event_ids
+
+        event_ids = await self._write(archive)
+        for event_id in event_ids:
+            self._events.pop(event_id)
+            self._counts.pop(event_id)
+            self._notify_changed(event_id)
+        return len(event_ids)
+
+    async def compact(self, pages: int = VACUUM_PAGES) -> None:
+        def compact(conn: sqlite3.Connection) -> None:
+            conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+            conn.execute("PRAGMA optimize")
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._writer, self._run, compact)
+
+    async def recount_subscriptions(self) -> None:
+        await self._subscriptions.flush()
+        await self._write(lambda conn: conn.execute(SQL_RECOUNT_SUBSCRIPTIONS))
+        self._counts.clear()
+
+    async def get_fsm_record(self, chat_id: int, user_id: int) -> tuple[str | None, str | None] | None:
+        def select(conn: sqlite3.Connection) -> tuple[str | None, str | None] | None:
+            row = conn.execute(
+                "SELECT state, data FROM fsm_states WHERE chat_id = ? AND user_id = ?",
+                (chat_id, user_id),
+            ).fetchone()
+            return (row["state"], row["data"]) if row else None
+
+        return await self._read(select)
+
+    async def save_fsm_record(
+        self,
+        chat_id: int,
+        user_id: int,
+        state: str | None,
+        data: str | None,
+        now: datetime,
+    ) -> None:
+        def save(conn: sqlite3.Connection) -> None:
+            if state is None and data is None:
+                conn.execute(
+                    "DELETE FROM fsm_states WHERE chat_id = ? AND user_id = ?",
+                    (chat_id, user_id),
+                )
+                return
+            conn.execute(
+                """
+                INSERT INTO fsm_states (chat_id, user_id, state, data, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (chat_id, user_id) DO UPDATE SET
+                    state = excluded.state,
+                    data = excluded.data,
+                    updated_at = excluded.updated_at
+                """,
+                (chat_id, user_id, state, data, to_epoch(now)),
+            )
+
+        await self._write(save)
+
+    async def evict_fsm_records(self, idle_before: datetime, batch_size: int) -> int:
+        def evict(conn: sqlite3.Connection) -> int:
+            cur = conn.execute(
+                """
+                DELETE FROM fsm_states
+                WHERE (chat_id, user_id) IN (
+                    SELECT chat_id, user_id FROM fsm_states
+                    WHERE updated_at < ?
+                    LIMIT ?
+                )
+                """,
+                (to_epoch(idle_before), batch_size),
+            )
+            return cur.rowcount
+
+        return await self._write(evict)
 
-    def count_subscriptions(self, event_id: int) -> int:
-        cur = self._db.cursor()
-        cur.execute(
-            "SELECT COUNT(*) as cnt FROM subscriptions WHERE event_id = ?",
-            (event_id,),
-        )
-        row = cur.fetchone()
-        return int(row["cnt"]) if row else 0
-
-    def is_subscribed(self, user_id: int, event_id: int) -> bool:
-        cur = self._db.cursor()
-        cur.execute(
-            "SELECT 1 FROM subscriptions WHERE user_id = ? AND event_id = ?",
-            (user_id, event_id),
-        )
-        return cur.fetchone() is not None
-
-    def add_subscription(self, user_id: int, event_id: int, now: datetime) -> None:
-        cur = self._db.cursor()
-        cur.execute(
-            """
-            INSERT OR IGNORE INTO subscriptions (user_id, event_id, subscribed_at)
-            VALUES (?, ?, ?)
-            """,
-            (user_id, event_id, now.isoformat()),
-        )
-        self._db.commit()
-
-    def remove_subscription(self, user_id: int, event_id: int) -> None:
-        cur = self._db.cursor()
-        cur.execute(
-            "DELETE FROM subscriptions WHERE user_id = ? AND event_id = ?",
-            (user_id, event_id),
-        )
-        self._db.commit()
-
-    def list_subscribers(self, event_id: int) -> list[int]:
-        cur = self._db.cursor()
-        cur.execute(
-            "SELECT user_id FROM subscriptions WHERE event_id = ?",
-            (event_id,),
-        )
-        return [row["user_id"] for row in cur.fetchall()]
+    def cache_stats(self) -> dict[str, dict[str, int]]:
+        return {"events": self._events.stats(), "counts": self._counts.stats(), "searches": self._searches.stats()}
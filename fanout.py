@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Iterable
+
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramForbiddenError,
+    TelegramNotFound,
+    TelegramRetryAfter,
+)
+
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_RATE = 30.0
+PER_CHAT_INTERVAL = 1.0
+DEFAULT_CONCURRENCY = 16
+MAX_RETRIES = 5
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float | None = None):
+        self._rate = rate
+        self._capacity = capacity if capacity is not None else rate
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        until = time.monotonic() + seconds
+        if until > self._paused_until:
+            self._paused_until = until
+        self._tokens = 0.0
+        self._updated = self._paused_until
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                elapsed = max(0.0, now - self._updated)
+                self._tokens = min(self._capacity, self._tokens + elapsed * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+
+class ChatThrottle:
+    def __init__(self, interval: float):
+        self._interval = interval
+        self._last_sent: dict[int, float] = {}
+
+    async def wait(self, chat_id: int) -> None:
+        last = self._last_sent.get(chat_id)
+        now = time.monotonic()
+        if last is not None and now - last < self._interval:
+            await asyncio.sleep(self._interval - (now - last))
+        self._last_sent[chat_id] = time.monotonic()
+
+    def prune(self) -> None:
+        threshold = time.monotonic() - self._interval
+        self._last_sent = {
+            chat_id: sent_at
+            for chat_id, sent_at in self._last_sent.items()
+            if sent_at > threshold
+        }
+
+
+@dataclass
+class FanOutReport:
+    delivered: int = 0
+    failed: int = 0
+    pruned: int = 0
+    delivered_chat_ids: list[int] = field(default_factory=list)
+    failed_chat_ids: list[int] = field(default_factory=list)
+    blocked_chat_ids: list[int] = field(default_factory=list)
+    in_doubt_chat_ids: list[int] = field(default_factory=list)
+    elapsed: float = 0.0
+
+
+class ReminderFanOut:
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        rate: float = GLOBAL_RATE,
+        per_chat_interval: float = PER_CHAT_INTERVAL,
+    ):
+        self._concurrency = concurrency
+        self.rate = rate
+        self._bucket = TokenBucket(rate)
+        self._throttle = ChatThrottle(per_chat_interval)
+
+    async def run(
+        self,
+        chat_ids: Iterable[int],
+        send: Callable[[int], Awaitable[object]],
+        report: FanOutReport | None = None,
+    ) -> FanOutReport:
+        report = report if report is not None else FanOutReport()
+        started = time.monotonic()
+        pending = iter(chat_ids)
+
+        async def worker() -> None:
+            for chat_id in pending:
+                await self._deliver(chat_id, send, report)
+
+        await asyncio.gather(*(worker() for _ in range(self._concurrency)))
+        self._throttle.prune()
+        report.elapsed = time.monotonic() - started
+        return report
+
+    async def _deliver(
+        self,
+        chat_id: int,
+        send: Callable[[int], Awaitable[object]],
+        report: FanOutReport,
+    ) -> None:
+        for _ in range(MAX_RETRIES):
+            await self._throttle.wait(chat_id)
+            await self._bucket.acquire()
+            try:
+                await send(chat_id)
+            except asyncio.CancelledError:
+                # The request may already have reached Telegram.
+                report.in_doubt_chat_ids.append(chat_id)
+                raise
+            except TelegramRetryAfter as exc:
+                logger.warning("Flood control hit, pausing sends for %s s", exc.retry_after)
+                self._bucket.pause(exc.retry_after)
+                continue
+            except (TelegramForbiddenError, TelegramNotFound):
+                report.pruned += 1
+                report.blocked_chat_ids.append(chat_id)
+                return
+            except TelegramAPIError as exc:
+                logger.warning("Failed to deliver reminder to %s: %s", chat_id, exc)
+                report.failed += 1
+                report.failed_chat_ids.append(chat_id)
+                return
+            report.delivered += 1
+            report.delivered_chat_ids.append(chat_id)
+            return
+        report.failed += 1
+        report.failed_chat_ids.append(chat_id)
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+from cache import TTLCache
+from db import Database
+
+
+logger = logging.getLogger(__name__)
+
+STATE_TTL = 24 * 60 * 60
+EVICTION_INTERVAL = 10 * 60
+EVICTION_BATCH = 500
+HOT_CACHE_SIZE = 4096
+HOT_CACHE_TTL = 10 * 60
+
+
+@dataclass
+class FSMRecord:
+    state: str | None = None
+    data: dict[str, Any] = field(default_factory=dict)
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode_object(obj: dict[str, Any]) -> Any:
+    if obj.keys() == {"__datetime__"}:
+        return datetime.fromisoformat(obj["__datetime__"])
+    return obj
+
+
+def _dump_data(data: dict[str, Any]) -> str | None:
+    if not data:
+        return None
+    return json.dumps(data, default=_encode_value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _load_data(raw: str | None) -> dict[str, Any]:
+    if not raw:
+        return {}
+    return json.loads(raw, object_hook=_decode_object)
+
+
+class SQLiteStorage(BaseStorage):
+    def __init__(
+        self,
+        db: Database,
+        ttl: int = STATE_TTL,
+        eviction_interval: int = EVICTION_INTERVAL,
+        eviction_batch: int = EVICTION_BATCH,
+        cache_size: int = HOT_CACHE_SIZE,
+    ):
+        self._db = db
+        self._ttl = ttl
+        self._eviction_interval = eviction_interval
+        self._eviction_batch = eviction_batch
+        self._cache: TTLCache[tuple[int, int], FSMRecord] = TTLCache(
+            cache_size,
+            min(ttl, HOT_CACHE_TTL),
+        )
+        self._eviction_task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._eviction_task is None:
+            self._eviction_task = asyncio.get_running_loop().create_task(self._evict_forever())
+
+    async def close(self) -> None:
+        if self._eviction_task is not None:
+            self._eviction_task.cancel()
+            try:
+                await self._eviction_task
+            except asyncio.CancelledError:
+                pass
+            self._eviction_task = None
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        record = await self._load(key)
+        record.state = state.state if isinstance(state, State) else state
+        await self._save(key, record)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        return (await self._load(key)).state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            msg = f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            raise DataNotDictLikeError(msg)
+        record = await self._load(key)
+        record.data = data.copy()
+        await self._save(key, record)
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        return (await self._load(key)).data.copy()
+
+    async def evict_expired(self) -> int:
+        idle_before = datetime.now(timezone.utc) - timedelta(seconds=self._ttl)
+        evicted = 0
+        while True:
+            removed = await self._db.evict_fsm_records(idle_before, self._eviction_batch)
+            evicted += removed
+            if removed < self._eviction_batch:
+                return evicted
+            await asyncio.sleep(0)
+
+    async def _evict_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self._eviction_interval)
+            try:
+                evicted = await self.evict_expired()
+            except Exception:
+                logger.exception("Failed to evict idle FSM states")
+                continue
+            if evicted:
+                logger.info("Evicted %s idle FSM states", evicted)
+
+    async def _load(self, key: StorageKey) -> FSMRecord:
+        cache_key = (key.chat_id, key.user_id)
+        record = self._cache.get(cache_key)
+        if record is not None:
+            return FSMRecord(record.state, record.data)
+        version = self._cache.version
+        stored = await self._db.get_fsm_record(key.chat_id, key.user_id)
+        record = FSMRecord(stored[0], _load_data(stored[1])) if stored else FSMRecord()
+        self._cache.set(cache_key, record, version)
+        return FSMRecord(record.state, record.data)
+
+    async def _save(self, key: StorageKey, record: FSMRecord) -> None:
+        cache_key = (key.chat_id, key.user_id)
+        self._cache.pop(cache_key)
+        await self._db.save_fsm_record(
+            key.chat_id,
+            key.user_id,
+            record.state,
+            _dump_data(record.data),
+            datetime.now(timezone.utc),
+        )
+        self._cache.set(cache_key, record)
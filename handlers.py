@@ -1,28 +1,46 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import Awaitable, Callable
 
 from aiogram import F, Router
-from aiogram.filters import CommandStart
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.filters import Command, CommandObject, CommandStart
 from aiogram.fsm.context import FSMContext
-from aiogram.types import CallbackQuery, Message
+from aiogram.types import CallbackQuery, InlineQuery, InlineQueryResultArticle, InputTextMessageContent, Message
 
+import callbacks
+import render
 from config import Config
-from db import Database, Event
+from db import Database, event_cursor
+from importer import MAX_IMPORT_BYTES, EventImportError, parse_events
 from keyboards import (
     admin_confirm_delete_keyboard,
     admin_image_skip_keyboard,
     admin_manage_keyboard,
+    event_catalogue_keyboard,
     event_keyboard,
-    event_list_item_keyboard,
     main_menu_keyboard,
+    my_events_keyboard,
 )
 from scheduler import ReminderScheduler
-from states import AdminCreateEvent, AdminEditEvent
+from states import AdminCreateEvent, AdminEditEvent, AdminImportEvents
+
+
+CATALOGUE_PAGE_SIZE = 5
+MY_EVENTS_PAGE_SIZE = 8
+FIRST_PAGE = (0, 0)
+IMPORT_ERRORS_SHOWN = 20
+SEARCH_RESULTS = 10
+INLINE_RESULTS = 20
+INLINE_CACHE_TIME = 30
+
+CallbackHandler = Callable[..., Awaitable[None]]
 
 
 def build_router(config: Config, db: Database, scheduler: ReminderScheduler) -> Router:
     router = Router()
+    routes: dict[str, tuple[CallbackHandler, bool]] = {}
 
     def is_admin(user_id: int) -> bool:
         return user_id in config.admin_ids
@@ -30,42 +48,152 @@ def build_router(config: Config, db: Database, scheduler: ReminderScheduler) ->
     def now_moscow() -> datetime:
         return datetime.now(config.timezone)
 
-    def event_title(event: Event) -> str:
-        return f"{event.text}\n📅 {event.start_at.strftime('%d.%m.%Y %H:%M')}"
+    def on_callback(action: str, admin: bool = False) -> Callable[[CallbackHandler], CallbackHandler]:
+        def register(handler: CallbackHandler) -> CallbackHandler:
+            routes[action] = (handler, admin)
+            return handler
 
-    async def show_event(message: Message | CallbackQuery, event_id: int, user_id: int) -> None:
-        event = db.get_event(event_id)
+        return register
+
+    async def show_event(
+        message: Message | CallbackQuery,
+        event_id: int,
+        user_id: int,
+        edit: bool = False,
+    ) -> None:
+        event = await db.get_event(event_id)
         if not event or event.start_at <= now_moscow():
-            await _answer(message, "Событие не найдено или уже прошло.")
+            await _answer(message, "Событие не найдено или уже прошло.", edit=edit)
             return
-        subscribers_count = db.count_subscriptions(event_id)
-        is_subscribed = db.is_subscribed(user_id, event_id)
-        text = (
-            f"{event.text}\n\n"
-            f"📅 {event.start_at.strftime('%d.%m.%Y %H:%M')}\n"
-            f"👥 Подписчиков: {subscribers_count}"
-        )
+        subscribers_count = await db.count_subscriptions(event_id)
+        is_subscribed = await db.is_subscribed(user_id, event_id)
+        text = render.card_caption(event, subscribers_count)
         keyboard = event_keyboard(is_subscribed, subscribers_count, is_admin(user_id), event_id)
-        await _answer(message, text, image_id=event.image_file_id, keyboard=keyboard)
+        await _answer(message, text, image_id=event.image_file_id, keyboard=keyboard, edit=edit)
 
     async def _answer(
         target: Message | CallbackQuery,
         text: str,
         image_id: str | None = None,
         keyboard=None,
+        edit: bool = False,
     ) -> None:
         if isinstance(target, CallbackQuery):
             message = target.message
         else:
             message = target
+        if edit and isinstance(target, CallbackQuery) and await _edit(message, text, image_id, keyboard):
+            return
         if image_id:
             await message.answer_photo(photo=image_id, caption=text, reply_markup=keyboard)
         else:
             await message.answer(text, reply_markup=keyboard)
 
+    async def _edit(message: Message, text: str, image_id: str | None, keyboard) -> bool:
+        if not isinstance(message, Message):
+            return False
+        if image_id:
+            if not message.photo:
+                return False
+            current = message.caption
+        else:
+            if message.text is None:
+                return False
+            current = message.text
+        try:
+            if current == text:
+                await message.edit_reply_markup(reply_markup=keyboard)
+            elif image_id:
+                await message.edit_caption(caption=text, reply_markup=keyboard)
+            else:
+                await message.edit_text(text, reply_markup=keyboard)
+        except TelegramBadRequest as exc:
+            return "message is not modified" in exc.message
+        return True
+
+    async def _replace_keyboard(call: CallbackQuery, text: str, keyboard) -> None:
+        if not isinstance(call.message, Message):
+            await call.message.answer(text, reply_markup=keyboard)
+            return
+        try:
+            await call.message.edit_reply_markup(reply_markup=keyboard)
+        except TelegramBadRequest as exc:
+            if "message is not modified" not in exc.message:
+                await call.message.answer(text, reply_markup=keyboard)
+
+    async def show_catalogue(
+        call: CallbackQuery,
+        after: tuple[int, int] | None = None,
+        before: tuple[int, int] | None = None,
+    ) -> None:
+        page = await db.list_events_page(
+            now_moscow(),
+            CATALOGUE_PAGE_SIZE,
+            after=after,
+            before=before,
+        )
+        if not page.events and (after or before):
+            page = await db.list_events_page(now_moscow(), CATALOGUE_PAGE_SIZE)
+        if not page.events:
+            await _answer(
+                call,
+                "Пока нет будущих событий.",
+                keyboard=event_catalogue_keyboard((), None, None),
+                edit=True,
+            )
+            return
+        lines = ["Будущие события:"]
+        items = []
+        for number, event in enumerate(page.events, start=1):
+            lines.append(f"\n{number}. {render.event_title(event)}")
+            items.append((event.id, f"{number}. {render.short_title(event)}"))
+        keyboard = event_catalogue_keyboard(
+            tuple(items),
+            prev_cursor=event_cursor(page.events[0]) if page.has_prev else None,
+            next_cursor=event_cursor(page.events[-1]) if page.has_next else None,
+        )
+        await _answer(call, "\n".join(lines), keyboard=keyboard, edit=True)
+
+    async def show_my_events(
+        call: CallbackQuery,
+        after: tuple[int, int] | None = None,
+        before: tuple[int, int] | None = None,
+    ) -> None:
+        page = await db.list_user_events_page(
+            call.from_user.id,
+            now_moscow(),
+            MY_EVENTS_PAGE_SIZE,
+            after=after,
+            before=before,
+        )
+        if not page.events and (after or before):
+            page = await db.list_user_events_page(call.from_user.id, now_moscow(), MY_EVENTS_PAGE_SIZE)
+        if not page.events:
+            await _answer(
+                call,
+                "У вас нет активных напоминаний.",
+                keyboard=my_events_keyboard((), FIRST_PAGE, None, None),
+                edit=True,
+            )
+            return
+        lines = ["Мои напоминания:"]
+        items = []
+        for number, event in enumerate(page.events, start=1):
+            lines.append(f"\n{number}. {render.event_title(event)}\nНапомню за {event.reminder_minutes} мин.")
+            items.append((event.id, f"{number}. {render.short_title(event)}"))
+        first = page.events[0]
+        keyboard = my_events_keyboard(
+            tuple(items),
+            page_cursor=(first.start_ts, first.id - 1) if page.has_prev else FIRST_PAGE,
+            prev_cursor=event_cursor(first) if page.has_prev else None,
+            next_cursor=event_cursor(page.events[-1]) if page.has_next else None,
+        )
+        await _answer(call, "\n".join(lines), keyboard=keyboard, edit=True)
+
     @router.message(CommandStart())
     async def start(message: Message, state: FSMContext) -> None:
         await state.clear()
+        await db.unblock_chat(message.from_user.id)
         parts = message.text.split(maxsplit=1)
         if len(parts) == 2 and parts[1].startswith("event_"):
             try:
@@ -80,64 +208,78 @@ def build_router(config: Config, db: Database, scheduler: ReminderScheduler) ->
             reply_markup=main_menu_keyboard(is_admin(message.from_user.id)),
         )
 
-    @router.callback_query(F.data == "menu")
+    @on_callback(callbacks.MENU)
     async def open_menu(call: CallbackQuery, state: FSMContext) -> None:
         await state.clear()
-        await call.message.answer(
+        await _answer(
+            call,
             "Главное меню:",
-            reply_markup=main_menu_keyboard(is_admin(call.from_user.id)),
+            keyboard=main_menu_keyboard(is_admin(call.from_user.id)),
+            edit=True,
         )
         await call.answer()
 
-    @router.callback_query(F.data == "events:list")
-    async def list_events(call: CallbackQuery) -> None:
-        events = db.list_future_events(now_moscow())
-        if not events:
-            await call.message.answer("Пока нет будущих событий.")
-            await call.answer()
-            return
-        for event in events:
-            await _answer(
-                call,
-                event_title(event),
-                image_id=event.image_file_id,
-                keyboard=event_list_item_keyboard(event.id),
-            )
+    @on_callback(callbacks.EVENTS)
+    async def list_events(call: CallbackQuery, state: FSMContext) -> None:
+        await show_catalogue(call)
         await call.answer()
 
-    @router.callback_query(F.data.startswith("event:open:"))
-    async def open_event(call: CallbackQuery) -> None:
-        event_id = int(call.data.split(":")[-1])
-        await show_event(call, event_id, call.from_user.id)
+    @on_callback(callbacks.EVENTS_NEXT)
+    async def list_events_next(call: CallbackQuery, state: FSMContext, start_at: int, event_id: int) -> None:
+        await show_catalogue(call, after=(start_at, event_id))
         await call.answer()
 
-    @router.callback_query(F.data.startswith("event:sub:"))
-    async def subscribe(call: CallbackQuery) -> None:
-        event_id = int(call.data.split(":")[-1])
-        event = db.get_event(event_id)
+    @on_callback(callbacks.EVENTS_PREV)
+    async def list_events_prev(call: CallbackQuery, state: FSMContext, start_at: int, event_id: int) -> None:
+        await show_catalogue(call, before=(start_at, event_id))
+        await call.answer()
+
+    @on_callback(callbacks.MY_EVENTS)
+    async def list_my_events(call: CallbackQuery, state: FSMContext) -> None:
+        await show_my_events(call)
+        await call.answer()
+
+    @on_callback(callbacks.MY_EVENTS_NEXT)
+    async def list_my_events_next(call: CallbackQuery, state: FSMContext, start_at: int, event_id: int) -> None:
+        await show_my_events(call, after=(start_at, event_id))
+        await call.answer()
+
+    @on_callback(callbacks.MY_EVENTS_PREV)
+    async def list_my_events_prev(call: CallbackQuery, state: FSMContext, start_at: int, event_id: int) -> None:
+        await show_my_events(call, before=(start_at, event_id))
+        await call.answer()
+
+    @on_callback(callbacks.EVENT_OPEN)
+    async def open_event(call: CallbackQuery, state: FSMContext, event_id: int) -> None:
+        await show_event(call, event_id, call.from_user.id, edit=True)
+        await call.answer()
+
+    @on_callback(callbacks.EVENT_SUB)
+    async def subscribe(call: CallbackQuery, state: FSMContext, event_id: int) -> None:
+        event = await db.get_event(event_id)
         if not event or event.start_at <= now_moscow():
             await call.answer("Событие недоступно", show_alert=True)
             return
-        db.add_subscription(call.from_user.id, event_id, now_moscow())
-        await show_event(call, event_id, call.from_user.id)
+        await db.unblock_chat(call.from_user.id)
+        await db.add_subscription(call.from_user.id, event_id, now_moscow())
+        await show_event(call, event_id, call.from_user.id, edit=True)
         await call.answer("Напоминание включено")
 
-    @router.callback_query(F.data.startswith("event:unsub:"))
-    async def unsubscribe(call: CallbackQuery) -> None:
-        event_id = int(call.data.split(":")[-1])
-        db.remove_subscription(call.from_user.id, event_id)
-        await show_event(call, event_id, call.from_user.id)
+    @on_callback(callbacks.EVENT_UNSUB)
+    async def unsubscribe(call: CallbackQuery, state: FSMContext, event_id: int, *page_cursor: int) -> None:
+        await db.remove_subscription(call.from_user.id, event_id)
+        if page_cursor:
+            await show_my_events(call, after=None if page_cursor == FIRST_PAGE else page_cursor)
+        else:
+            await show_event(call, event_id, call.from_user.id, edit=True)
         await call.answer("Вы отписались")
 
-    @router.callback_query(F.data == "noop")
-    async def noop(call: CallbackQuery) -> None:
+    @on_callback(callbacks.NOOP)
+    async def noop(call: CallbackQuery, state: FSMContext) -> None:
         await call.answer("Уже включено")
 
-    @router.callback_query(F.data == "admin:create")
+    @on_callback(callbacks.ADMIN_CREATE, admin=True)
     async def admin_create(call: CallbackQuery, state: FSMContext) -> None:
-        if not is_admin(call.from_user.id):
-            await call.answer()
-            return
         await state.set_state(AdminCreateEvent.waiting_datetime)
         await call.message.answer("Введите дату и время события в формате: YYYY-MM-DD HH:MM")
         await call.answer()
@@ -175,12 +317,12 @@ def build_router(config: Config, db: Database, scheduler: ReminderScheduler) ->
             await message.answer("Значение должно быть больше нуля.")
             return
         data = await state.get_data()
-        event_id = db.create_event(
+        event_id = await db.create_event(
             start_at=data["start_at"],
             text=data["text"],
             reminder_minutes=minutes,
         )
-        scheduler.schedule_event(event_id, data["start_at"], minutes)
+        await scheduler.schedule_event(event_id, data["start_at"], minutes)
         await state.update_data(event_id=event_id)
         await state.set_state(AdminCreateEvent.waiting_image)
         await message.answer(
@@ -196,60 +338,40 @@ def build_router(config: Config, db: Database, scheduler: ReminderScheduler) ->
         data = await state.get_data()
         event_id = data["event_id"]
         photo = message.photo[-1]
-        db.update_event(event_id, image_file_id=photo.file_id)
+        await db.update_event(event_id, image_file_id=photo.file_id)
         await state.clear()
         await message.answer("Изображение сохранено.")
         await show_event(message, event_id, message.from_user.id)
 
-    @router.callback_query(AdminCreateEvent.waiting_image, F.data.startswith("admin:image_skip:"))
-    async def admin_create_image_skip(call: CallbackQuery, state: FSMContext) -> None:
+    @on_callback(callbacks.ADMIN_IMAGE_SKIP)
+    async def admin_create_image_skip(call: CallbackQuery, state: FSMContext, event_id: int) -> None:
+        if await state.get_state() != AdminCreateEvent.waiting_image.state:
+            await call.answer()
+            return
         await state.clear()
-        event_id = int(call.data.split(":")[-1])
         await call.message.answer("Изображение пропущено.")
         await show_event(call, event_id, call.from_user.id)
         await call.answer()
 
-    @router.callback_query(F.data.startswith("admin:manage:"))
-    async def admin_manage(call: CallbackQuery) -> None:
-        if not is_admin(call.from_user.id):
-            await call.answer()
-            return
-        event_id = int(call.data.split(":")[-1])
-        await call.message.answer(
-            "Управление событием:",
-            reply_markup=admin_manage_keyboard(event_id),
-        )
+    @on_callback(callbacks.ADMIN_MANAGE, admin=True)
+    async def admin_manage(call: CallbackQuery, state: FSMContext, event_id: int) -> None:
+        await _replace_keyboard(call, "Управление событием:", admin_manage_keyboard(event_id))
         await call.answer()
 
-    @router.callback_query(F.data.startswith("admin:delete:"))
-    async def admin_delete(call: CallbackQuery) -> None:
-        if not is_admin(call.from_user.id):
-            await call.answer()
-            return
-        event_id = int(call.data.split(":")[-1])
-        await call.message.answer(
-            "Удалить событие?",
-            reply_markup=admin_confirm_delete_keyboard(event_id),
-        )
+    @on_callback(callbacks.ADMIN_DELETE, admin=True)
+    async def admin_delete(call: CallbackQuery, state: FSMContext, event_id: int) -> None:
+        await _replace_keyboard(call, "Удалить событие?", admin_confirm_delete_keyboard(event_id))
         await call.answer()
 
-    @router.callback_query(F.data.startswith("admin:confirm_delete:"))
-    async def admin_confirm_delete(call: CallbackQuery) -> None:
-        if not is_admin(call.from_user.id):
-            await call.answer()
-            return
-        event_id = int(call.data.split(":")[-1])
-        db.delete_event(event_id)
+    @on_callback(callbacks.ADMIN_CONFIRM_DELETE, admin=True)
+    async def admin_confirm_delete(call: CallbackQuery, state: FSMContext, event_id: int) -> None:
+        await db.delete_event(event_id)
         scheduler.remove_event(event_id)
-        await call.message.answer("Событие удалено.")
+        await _answer(call, "Событие удалено.", edit=True)
         await call.answer()
 
-    @router.callback_query(F.data.startswith("admin:edit_dt:"))
-    async def admin_edit_dt(call: CallbackQuery, state: FSMContext) -> None:
-        if not is_admin(call.from_user.id):
-            await call.answer()
-            return
-        event_id = int(call.data.split(":")[-1])
+    @on_callback(callbacks.ADMIN_EDIT_DT, admin=True)
+    async def admin_edit_dt(call: CallbackQuery, state: FSMContext, event_id: int) -> None:
         await state.update_data(event_id=event_id)
         await state.set_state(AdminEditEvent.waiting_datetime)
         await call.message.answer("Введите новую дату и время: YYYY-MM-DD HH:MM")
@@ -265,23 +387,19 @@ def build_router(config: Config, db: Database, scheduler: ReminderScheduler) ->
         start_at = start_at.replace(tzinfo=config.timezone)
         data = await state.get_data()
         event_id = data["event_id"]
-        event = db.get_event(event_id)
+        event = await db.get_event(event_id)
         if not event:
             await message.answer("Событие не найдено.")
             await state.clear()
             return
-        db.update_event(event_id, start_at=start_at)
-        scheduler.schedule_event(event_id, start_at, event.reminder_minutes)
+        await db.update_event(event_id, start_at=start_at)
+        await scheduler.schedule_event(event_id, start_at, event.reminder_minutes)
         await state.clear()
         await message.answer("Дата обновлена.")
         await show_event(message, event_id, message.from_user.id)
 
-    @router.callback_query(F.data.startswith("admin:edit_text:"))
-    async def admin_edit_text(call: CallbackQuery, state: FSMContext) -> None:
-        if not is_admin(call.from_user.id):
-            await call.answer()
-            return
-        event_id = int(call.data.split(":")[-1])
+    @on_callback(callbacks.ADMIN_EDIT_TEXT, admin=True)
+    async def admin_edit_text(call: CallbackQuery, state: FSMContext, event_id: int) -> None:
         await state.update_data(event_id=event_id)
         await state.set_state(AdminEditEvent.waiting_text)
         await call.message.answer("Введите новый текст анонса.")
@@ -295,17 +413,13 @@ def build_router(config: Config, db: Database, scheduler: ReminderScheduler) ->
             return
         data = await state.get_data()
         event_id = data["event_id"]
-        db.update_event(event_id, text=text)
+        await db.update_event(event_id, text=text)
         await state.clear()
         await message.answer("Текст обновлён.")
         await show_event(message, event_id, message.from_user.id)
 
-    @router.callback_query(F.data.startswith("admin:edit_reminder:"))
-    async def admin_edit_reminder(call: CallbackQuery, state: FSMContext) -> None:
-        if not is_admin(call.from_user.id):
-            await call.answer()
-            return
-        event_id = int(call.data.split(":")[-1])
+    @on_callback(callbacks.ADMIN_EDIT_REMINDER, admin=True)
+    async def admin_edit_reminder(call: CallbackQuery, state: FSMContext, event_id: int) -> None:
         await state.update_data(event_id=event_id)
         await state.set_state(AdminEditEvent.waiting_reminder)
         await call.message.answer("Введите новое значение напоминания (минуты).")
@@ -323,23 +437,19 @@ def build_router(config: Config, db: Database, scheduler: ReminderScheduler) ->
             return
         data = await state.get_data()
         event_id = data["event_id"]
-        event = db.get_event(event_id)
+        event = await db.get_event(event_id)
         if not event:
             await message.answer("Событие не найдено.")
             await state.clear()
             return
-        db.update_event(event_id, reminder_minutes=minutes)
-        scheduler.schedule_event(event_id, event.start_at, minutes)
+        await db.update_event(event_id, reminder_minutes=minutes)
+        await scheduler.schedule_event(event_id, event.start_at, minutes)
         await state.clear()
         await message.answer("Напоминание обновлено.")
         await show_event(message, event_id, message.from_user.id)
 
-    @router.callback_query(F.data.startswith("admin:edit_image:"))
-    async def admin_edit_image(call: CallbackQuery, state: FSMContext) -> None:
-        if not is_admin(call.from_user.id):
-            await call.answer()
-            return
-        event_id = int(call.data.split(":")[-1])
+    @on_callback(callbacks.ADMIN_EDIT_IMAGE, admin=True)
+    async def admin_edit_image(call: CallbackQuery, state: FSMContext, event_id: int) -> None:
         await state.update_data(event_id=event_id)
         await state.set_state(AdminEditEvent.waiting_image)
         await call.message.answer("Пришлите новое изображение.")
@@ -350,9 +460,107 @@ def build_router(config: Config, db: Database, scheduler: ReminderScheduler) ->
         data = await state.get_data()
         event_id = data["event_id"]
         photo = message.photo[-1]
-        db.update_event(event_id, image_file_id=photo.file_id)
+        await db.update_event(event_id, image_file_id=photo.file_id)
         await state.clear()
         await message.answer("Изображение обновлено.")
         await show_event(message, event_id, message.from_user.id)
 
+    @router.message(Command("import"))
+    async def admin_import(message: Message, state: FSMContext) -> None:
+        if not is_admin(message.from_user.id):
+            return
+        await state.set_state(AdminImportEvents.waiting_document)
+        await message.answer(
+            "Пришлите CSV или JSON со списком событий.\n"
+            "Колонки: start_at (YYYY-MM-DD HH:MM), text, reminder_minutes, image_file_id (необязательно)."
+        )
+
+    @router.message(AdminImportEvents.waiting_document, F.document)
+    async def admin_import_document(message: Message, state: FSMContext) -> None:
+        if (message.document.file_size or 0) > MAX_IMPORT_BYTES:
+            await message.answer("Файл слишком большой.")
+            return
+        content = await message.bot.download(message.document)
+        try:
+            document = content.read().decode("utf-8-sig")
+        except UnicodeDecodeError:
+            await message.answer("Файл должен быть в кодировке UTF-8.")
+            return
+        await import_events(message, state, document)
+
+    @router.message(AdminImportEvents.waiting_document, F.text)
+    async def admin_import_text(message: Message, state: FSMContext) -> None:
+        await import_events(message, state, message.text)
+
+    async def import_events(message: Message, state: FSMContext, document: str) -> None:
+        try:
+            drafts = parse_events(document, config.timezone, now_moscow())
+        except EventImportError as exc:
+            lines = exc.errors[:IMPORT_ERRORS_SHOWN]
+            if len(exc.errors) > IMPORT_ERRORS_SHOWN:
+                lines.append(f"…и ещё {len(exc.errors) - IMPORT_ERRORS_SHOWN}")
+            await message.answer(
+                "Ничего не импортировано:\n" + "\n".join(lines) + "\n\nИсправьте документ и пришлите снова."
+            )
+            return
+        event_ids = await db.create_events(
+            [(draft.start_at, draft.text, draft.reminder_minutes, draft.image_file_id) for draft in drafts]
+        )
+        await scheduler.schedule_events(
+            [(event_id, draft.start_at, draft.reminder_minutes) for event_id, draft in zip(event_ids, drafts)]
+        )
+        await state.clear()
+        await message.answer(f"Импортировано событий: {len(event_ids)}.")
+
+    @router.message(Command("search"))
+    async def search(message: Message, command: CommandObject) -> None:
+        query = (command.args or "").strip()
+        if not query:
+            await message.answer("Использование: /search <текст>")
+            return
+        events = await db.search_events(query, now_moscow(), SEARCH_RESULTS)
+        if not events:
+            await message.answer("Ничего не найдено.")
+            return
+        lines = ["Найденные события:"]
+        items = []
+        for number, event in enumerate(events, start=1):
+            lines.append(f"\n{number}. {render.event_title(event)}")
+            items.append((event.id, f"{number}. {render.short_title(event)}"))
+        await message.answer("\n".join(lines), reply_markup=event_catalogue_keyboard(tuple(items), None, None))
+
+    @router.inline_query()
+    async def inline_search(query: InlineQuery) -> None:
+        text = query.query.strip()
+        if text:
+            events = await db.search_events(text, now_moscow(), INLINE_RESULTS)
+        else:
+            events = (await db.list_events_page(now_moscow(), INLINE_RESULTS)).events
+        username = (await query.bot.me()).username
+        results = [
+            InlineQueryResultArticle(
+                id=str(event.id),
+                title=render.short_title(event),
+                description=event.start_at.strftime(render.DATE_FORMAT),
+                input_message_content=InputTextMessageContent(
+                    message_text=f"{render.event_title(event)}\n\nt.me/{username}?start=event_{event.id}"
+                ),
+            )
+            for event in events
+        ]
+        await query.answer(results, cache_time=INLINE_CACHE_TIME)
+
+    @router.callback_query()
+    async def dispatch_callback(call: CallbackQuery, state: FSMContext) -> None:
+        callback = callbacks.decode(call.data)
+        route = routes.get(callback.action) if callback else None
+        if route is None:
+            await call.answer()
+            return
+        handler, admin = route
+        if admin and not is_admin(call.from_user.id):
+            await call.answer()
+            return
+        await handler(call, state, *callback.args)
+
     return router
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from dataclasses import dataclass
+from datetime import datetime, tzinfo
+
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M"
+MAX_IMPORT_ROWS = 1000
+MAX_IMPORT_BYTES = 1024 * 1024
+CSV_FIELDS = ("start_at", "text", "reminder_minutes", "image_file_id")
+
+
+@dataclass(frozen=True)
+class EventDraft:
+    start_at: datetime
+    text: str
+    reminder_minutes: int
+    image_file_id: str | None = None
+
+
+class EventImportError(ValueError):
+    def __init__(self, errors: list[str]):
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+
+def parse_events(document: str, timezone: tzinfo, now: datetime) -> list[EventDraft]:
+    document = document.strip()
+    if not document:
+        raise EventImportError(["Документ пуст."])
+    rows = _json_rows(document) if document[0] in "[{" else _csv_rows(document)
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise EventImportError([f"Слишком много строк: {len(rows)}, максимум {MAX_IMPORT_ROWS}."])
+    drafts = []
+    errors = []
+    for number, row in enumerate(rows, start=1):
+        try:
+            drafts.append(_parse_row(row, timezone, now))
+        except ValueError as exc:
+            errors.append(f"Строка {number}: {exc}")
+    if errors:
+        raise EventImportError(errors)
+    if not drafts:
+        raise EventImportError(["В документе нет событий."])
+    return drafts
+
+
+def _json_rows(document: str) -> list[dict]:
+    try:
+        data = json.loads(document)
+    except json.JSONDecodeError as exc:
+        raise EventImportError([f"Некорректный JSON: {exc}"]) from exc
+    if isinstance(data, dict):
+        data = data.get("events")
+    if not isinstance(data, list):
+        raise EventImportError(["Ожидается список событий или объект с ключом «events»."])
+    return [row if isinstance(row, dict) else {} for row in data]
+
+
+def _csv_rows(document: str) -> list[dict]:
+    reader = csv.DictReader(io.StringIO(document))
+    missing = [field for field in CSV_FIELDS[:3] if field not in (reader.fieldnames or ())]
+    if missing:
+        raise EventImportError([f"В заголовке CSV нет колонок: {', '.join(missing)}."])
+    return list(reader)
+
+
+def _parse_row(row: dict, timezone: tzinfo, now: datetime) -> EventDraft:
+    try:
+        start_at = datetime.strptime(str(row.get("start_at") or "").strip(), DATETIME_FORMAT)
+    except ValueError:
+        raise ValueError("дата должна быть в формате YYYY-MM-DD HH:MM") from None
+    start_at = start_at.replace(tzinfo=timezone)
+    if start_at <= now:
+        raise ValueError("дата события уже прошла")
+    text = str(row.get("text") or "").strip()
+    if not text:
+        raise ValueError("текст не должен быть пустым")
+    try:
+        reminder_minutes = int(str(row.get("reminder_minutes") or "").strip())
+    except ValueError:
+        raise ValueError("напоминание должно быть целым числом минут") from None
+    if reminder_minutes <= 0:
+        raise ValueError("напоминание должно быть больше нуля")
+    image_file_id = str(row.get("image_file_id") or "").strip() or None
+    return EventDraft(start_at, text, reminder_minutes, image_file_id)
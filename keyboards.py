@@ -1,61 +1,132 @@
+from functools import lru_cache
+
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
+import callbacks
+from callbacks import encode
+
+
+KEYBOARD_CACHE_SIZE = 4096
 
+
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def main_menu_keyboard(is_admin: bool) -> InlineKeyboardMarkup:
-    rows = [[InlineKeyboardButton(text="Все события", callback_data="events:list")]]
+    rows = [
+        [InlineKeyboardButton(text="Все события", callback_data=encode(callbacks.EVENTS))],
+        [InlineKeyboardButton(text="🔔 Мои напоминания", callback_data=encode(callbacks.MY_EVENTS))],
+    ]
     if is_admin:
-        rows.append([InlineKeyboardButton(text="➕ Создать событие", callback_data="admin:create")])
+        rows.append([InlineKeyboardButton(text="➕ Создать событие", callback_data=encode(callbacks.ADMIN_CREATE))])
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def event_keyboard(is_subscribed: bool, subscribers_count: int, is_admin: bool, event_id: int) -> InlineKeyboardMarkup:
     rows: list[list[InlineKeyboardButton]] = []
     if is_subscribed:
-        rows.append([InlineKeyboardButton(text="🔔 Напоминание включено", callback_data="noop")])
-        rows.append([InlineKeyboardButton(text="Отписаться", callback_data=f"event:unsub:{event_id}")])
+        rows.append([InlineKeyboardButton(text="🔔 Напоминание включено", callback_data=encode(callbacks.NOOP))])
+        rows.append([
+            InlineKeyboardButton(text="Отписаться", callback_data=encode(callbacks.EVENT_UNSUB, event_id))
+        ])
     else:
         rows.append([
             InlineKeyboardButton(
                 text=f"🔔 Напомнить ({subscribers_count})",
-                callback_data=f"event:sub:{event_id}",
+                callback_data=encode(callbacks.EVENT_SUB, event_id),
             )
         ])
-    rows.append([InlineKeyboardButton(text="Все события", callback_data="events:list")])
+    rows.append([InlineKeyboardButton(text="Все события", callback_data=encode(callbacks.EVENTS))])
     if is_admin:
-        rows.append([InlineKeyboardButton(text="⚙️ Управление", callback_data=f"admin:manage:{event_id}")])
+        rows.append([
+            InlineKeyboardButton(text="⚙️ Управление", callback_data=encode(callbacks.ADMIN_MANAGE, event_id))
+        ])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def event_catalogue_keyboard(
+    items: tuple[tuple[int, str], ...],
+    prev_cursor: tuple[int, int] | None,
+    next_cursor: tuple[int, int] | None,
+) -> InlineKeyboardMarkup:
+    rows = [
+        [InlineKeyboardButton(text=title, callback_data=encode(callbacks.EVENT_OPEN, event_id))]
+        for event_id, title in items
+    ]
+    navigation = []
+    if prev_cursor:
+        navigation.append(
+            InlineKeyboardButton(text="◀️ Назад", callback_data=encode(callbacks.EVENTS_PREV, *prev_cursor))
+        )
+    if next_cursor:
+        navigation.append(
+            InlineKeyboardButton(text="Вперёд ▶️", callback_data=encode(callbacks.EVENTS_NEXT, *next_cursor))
+        )
+    if navigation:
+        rows.append(navigation)
+    rows.append([InlineKeyboardButton(text="В меню", callback_data=encode(callbacks.MENU))])
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
-def event_list_item_keyboard(event_id: int) -> InlineKeyboardMarkup:
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def my_events_keyboard(
+    items: tuple[tuple[int, str], ...],
+    page_cursor: tuple[int, int],
+    prev_cursor: tuple[int, int] | None,
+    next_cursor: tuple[int, int] | None,
+) -> InlineKeyboardMarkup:
     rows = [
-        [InlineKeyboardButton(text="Открыть", callback_data=f"event:open:{event_id}")],
-        [InlineKeyboardButton(text="В меню", callback_data="menu")],
+        [
+            InlineKeyboardButton(text=title, callback_data=encode(callbacks.EVENT_OPEN, event_id)),
+            InlineKeyboardButton(text="✖️", callback_data=encode(callbacks.EVENT_UNSUB, event_id, *page_cursor)),
+        ]
+        for event_id, title in items
     ]
+    navigation = []
+    if prev_cursor:
+        navigation.append(
+            InlineKeyboardButton(text="◀️ Назад", callback_data=encode(callbacks.MY_EVENTS_PREV, *prev_cursor))
+        )
+    if next_cursor:
+        navigation.append(
+            InlineKeyboardButton(text="Вперёд ▶️", callback_data=encode(callbacks.MY_EVENTS_NEXT, *next_cursor))
+        )
+    if navigation:
+        rows.append(navigation)
+    rows.append([InlineKeyboardButton(text="В меню", callback_data=encode(callbacks.MENU))])
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def admin_manage_keyboard(event_id: int) -> InlineKeyboardMarkup:
     rows = [
-        [InlineKeyboardButton(text="✏️ Редактировать дату", callback_data=f"admin:edit_dt:{event_id}")],
-        [InlineKeyboardButton(text="✏️ Редактировать текст", callback_data=f"admin:edit_text:{event_id}")],
-        [InlineKeyboardButton(text="✏️ Редактировать напоминание", callback_data=f"admin:edit_reminder:{event_id}")],
-        [InlineKeyboardButton(text="🖼 Заменить изображение", callback_data=f"admin:edit_image:{event_id}")],
-        [InlineKeyboardButton(text="🗑 Удалить событие", callback_data=f"admin:delete:{event_id}")],
-        [InlineKeyboardButton(text="Назад", callback_data=f"event:open:{event_id}")],
+        [InlineKeyboardButton(text="✏️ Редактировать дату", callback_data=encode(callbacks.ADMIN_EDIT_DT, event_id))],
+        [InlineKeyboardButton(text="✏️ Редактировать текст", callback_data=encode(callbacks.ADMIN_EDIT_TEXT, event_id))],
+        [
+            InlineKeyboardButton(
+                text="✏️ Редактировать напоминание",
+                callback_data=encode(callbacks.ADMIN_EDIT_REMINDER, event_id),
+            )
+        ],
+        [InlineKeyboardButton(text="🖼 Заменить изображение", callback_data=encode(callbacks.ADMIN_EDIT_IMAGE, event_id))],
+        [InlineKeyboardButton(text="🗑 Удалить событие", callback_data=encode(callbacks.ADMIN_DELETE, event_id))],
+        [InlineKeyboardButton(text="Назад", callback_data=encode(callbacks.EVENT_OPEN, event_id))],
     ]
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def admin_confirm_delete_keyboard(event_id: int) -> InlineKeyboardMarkup:
     rows = [
-        [InlineKeyboardButton(text="Удалить", callback_data=f"admin:confirm_delete:{event_id}")],
-        [InlineKeyboardButton(text="Отмена", callback_data=f"admin:manage:{event_id}")],
+        [InlineKeyboardButton(text="Удалить", callback_data=encode(callbacks.ADMIN_CONFIRM_DELETE, event_id))],
+        [InlineKeyboardButton(text="Отмена", callback_data=encode(callbacks.ADMIN_MANAGE, event_id))],
     ]
     return InlineKeyboardMarkup(inline_keyboard=rows)
 
 
+@lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def admin_image_skip_keyboard(event_id: int) -> InlineKeyboardMarkup:
     rows = [
-        [InlineKeyboardButton(text="Пропустить", callback_data=f"admin:image_skip:{event_id}")],
+        [InlineKeyboardButton(text="Пропустить", callback_data=encode(callbacks.ADMIN_IMAGE_SKIP, event_id))],
     ]
     return InlineKeyboardMarkup(inline_keyboard=rows)
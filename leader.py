@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from db import Database
+
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_LEASE = "scheduler"
+LEASE_TTL = 15
+RENEW_INTERVAL = 5
+
+
+class LeaderElection:
+    def __init__(
+        self,
+        db: Database,
+        holder: str,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+        name: str = SCHEDULER_LEASE,
+        ttl: int = LEASE_TTL,
+        renew_interval: float = RENEW_INTERVAL,
+    ):
+        self._db = db
+        self._holder = holder
+        self._on_elected = on_elected
+        self._on_demoted = on_demoted
+        self._name = name
+        self._ttl = ttl
+        self._renew_interval = renew_interval
+        self._task: asyncio.Task | None = None
+        self.is_leader = False
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_leader:
+            await self._demote()
+            await self._db.release_lease(self._name, self._holder)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                acquired = await self._db.acquire_lease(
+                    self._name,
+                    self._holder,
+                    datetime.now(timezone.utc),
+                    self._ttl,
+                )
+            except Exception:
+                logger.exception("Failed to renew the %s lease", self._name)
+                acquired = False
+            if acquired and not self.is_leader:
+                logger.info("%s acquired the %s lease", self._holder, self._name)
+                self.is_leader = True
+                await self._call(self._on_elected)
+            elif not acquired and self.is_leader:
+                logger.warning("%s lost the %s lease", self._holder, self._name)
+                await self._demote()
+            await asyncio.sleep(self._renew_interval)
+
+    async def _demote(self) -> None:
+        self.is_leader = False
+        await self._call(self._on_demoted)
+
+    async def _call(self, callback: Callable[[], Awaitable[None]]) -> None:
+        try:
+            await callback()
+        except Exception:
+            logger.exception("Leadership callback failed")
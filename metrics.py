@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import bisect
+import functools
+import inspect
+import math
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware, Router
+from aiogram.types import CallbackQuery, TelegramObject
+from aiohttp import web
+
+import callbacks
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RUN_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+LAG_BUCKETS = (0.01, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+
+
+class Registry:
+    def __init__(self):
+        self.enabled = False
+        self._metrics: list[Metric] = []
+
+    def register(self, metric: Metric) -> None:
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return "+Inf" if value == math.inf else repr(float(value))
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = (), registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._registry = registry
+        registry.register(self)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        if not self._registry.enabled:
+            return
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        if not self._registry.enabled:
+            return
+        self._values[labels] = value
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, *args: Any, buckets: tuple[float, ...] = LATENCY_BUCKETS, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._buckets = buckets
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        if not self._registry.enabled:
+            return
+        item = self._values.get(labels)
+        if item is None:
+            item = self._values[labels] = ([0] * (len(self._buckets) + 1), [0.0])
+        item[0][bisect.bisect_left(self._buckets, value)] += 1
+        item[1][0] += value
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        for labels, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip((*self._buckets, math.inf), counts):
+                cumulative += count
+                le = _format_labels(self.labels, labels, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            suffix = _format_labels(self.labels, labels)
+            lines.append(f"{self.name}_sum{suffix} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+HANDLER_SECONDS = Histogram("vestnik_handler_seconds", "Update handler latency.", ("handler",))
+HANDLER_ERRORS = Counter("vestnik_handler_errors_total", "Update handlers that raised.", ("handler",))
+DB_SECONDS = Histogram("vestnik_db_seconds", "Database call latency, including executor wait.", ("method",))
+REMINDER_RUNS = Counter("vestnik_reminder_runs_total", "Reminder runs finished.")
+REMINDER_DELIVERIES = Counter("vestnik_reminder_deliveries_total", "Reminder deliveries by outcome.", ("outcome",))
+REMINDER_RUN_SECONDS = Histogram(
+    "vestnik_reminder_run_seconds", "Reminder fan-out duration.", buckets=RUN_BUCKETS
+)
+REMINDER_DEADLINE_MISS_SECONDS = Histogram(
+    "vestnik_reminder_deadline_miss_seconds",
+    "How late the last reminder of a run was sent.",
+    buckets=LAG_BUCKETS,
+)
+REMINDER_THROUGHPUT = Gauge("vestnik_reminder_throughput", "Smoothed reminder sends per second.")
+CALLBACK_THROTTLE = Counter(
+    "vestnik_callback_throttle_total", "Callback queries by throttling outcome.", ("outcome",)
+)
+SCHEDULER_LAG_SECONDS = Histogram(
+    "vestnik_scheduler_lag_seconds", "Delay between a reminder's fire time and its dispatch.", buckets=LAG_BUCKETS
+)
+
+CALLBACK_NAMES = {action: prefix for prefix, action in callbacks.LEGACY_PREFIXES.items()}
+
+
+class TimingMiddleware(BaseMiddleware):
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        name = self._name(event, data)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(name)
+            raise
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - started, name)
+
+    def _name(self, event: TelegramObject, data: dict[str, Any]) -> str:
+        if isinstance(event, CallbackQuery):
+            callback = callbacks.decode(event.data)
+            return CALLBACK_NAMES.get(callback.action, callback.action) if callback else "callback:unknown"
+        handler = data.get("handler")
+        return getattr(getattr(handler, "callback", None), "__name__", type(event).__name__)
+
+
+def instrument_router(router: Router) -> None:
+    middleware = TimingMiddleware()
+    router.message.middleware(middleware)
+    router.callback_query.middleware(middleware)
+
+
+def instrument_database(db: Any) -> None:
+    for name, method in inspect.getmembers(type(db), inspect.iscoroutinefunction):
+        if name.startswith("_") or name == "close":
+            continue
+        setattr(db, name, _timed(getattr(db, name), name))
+
+
+def _timed(method: Callable[..., Awaitable[Any]], name: str) -> Callable[..., Awaitable[Any]]:
+    @functools.wraps(method)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            DB_SECONDS.observe(time.perf_counter() - started, name)
+
+    return wrapper
+
+
+async def start_metrics_server(host: str, port: int, registry: Registry = REGISTRY) -> web.AppRunner:
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+    registry.enabled = True
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    return runner
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from db import Event
+
+
+CACHE_SIZE = 1024
+RENDERS_PER_EVENT = 8
+TITLE_MAX_LENGTH = 40
+DATE_FORMAT = "%d.%m.%Y %H:%M"
+
+
+class RenderCache:
+    def __init__(self, maxsize: int = CACHE_SIZE, per_event: int = RENDERS_PER_EVENT):
+        self._maxsize = maxsize
+        self._per_event = per_event
+        self._events: OrderedDict[int, tuple[int, dict[Hashable, str]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, event: Event, key: Hashable, build: Callable[[], str]) -> str:
+        entry = self._events.get(event.id)
+        if entry is None or entry[0] != event.version:
+            entry = (event.version, {})
+            self._events[event.id] = entry
+            while len(self._events) > self._maxsize:
+                self._events.popitem(last=False)
+        else:
+            self._events.move_to_end(event.id)
+        renders = entry[1]
+        value = renders.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = build()
+        if len(renders) >= self._per_event:
+            renders.pop(next(iter(renders)))
+        renders[key] = value
+        return value
+
+    def invalidate(self, event_id: int) -> None:
+        self._events.pop(event_id, None)
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._events), "hits": self.hits, "misses": self.misses}
+
+
+_cache = RenderCache()
+
+
+def _short_title(event: Event) -> str:
+    title = event.text.strip().split("\n", 1)[0]
+    if len(title) > TITLE_MAX_LENGTH:
+        title = title[: TITLE_MAX_LENGTH - 1].rstrip() + "…"
+    return title
+
+
+def short_title(event: Event) -> str:
+    return _cache.get(event, "short_title", lambda: _short_title(event))
+
+
+def event_title(event: Event) -> str:
+    return _cache.get(
+        event,
+        "title",
+        lambda: f"{short_title(event)}\n📅 {event.start_at.strftime(DATE_FORMAT)}",
+    )
+
+
+def card_caption(event: Event, subscribers_count: int) -> str:
+    return _cache.get(
+        event,
+        ("card", subscribers_count),
+        lambda: (
+            f"{event.text}\n\n"
+            f"📅 {event.start_at.strftime(DATE_FORMAT)}\n"
+            f"👥 Подписчиков: {subscribers_count}"
+        ),
+    )
+
+
+def reminder_caption(event: Event) -> str:
+    return _cache.get(
+        event,
+        "reminder",
+        lambda: (
+            "Скоро событие!\n\n"
+            f"{event.text}\n"
+            f"📅 {event.start_at.strftime(DATE_FORMAT)}"
+        ),
+    )
+
+
+def invalidate(event_id: int) -> None:
+    _cache.invalidate(event_id)
+
+
+def stats() -> dict[str, int]:
+    return _cache.stats()
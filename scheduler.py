@@ -1,63 +1,324 @@
 from __future__ import annotations
 
+import asyncio
+import heapq
+import logging
+import math
+import time
 from datetime import datetime, timedelta
 
 from aiogram import Bot
-from aiogram.exceptions import TelegramForbiddenError, TelegramNotFound
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
-from db import Database
+import metrics
+import render
+from db import (
+    DELIVERY_FAILED,
+    DELIVERY_IN_DOUBT,
+    DELIVERY_PENDING,
+    DELIVERY_PRUNED,
+    DELIVERY_SENT,
+    Database,
+    Event,
+    ReminderRun,
+    to_epoch,
+)
+from fanout import FanOutReport, ReminderFanOut
+
+
+logger = logging.getLogger(__name__)
+
+HORIZON = timedelta(hours=6)
+REFILL_INTERVAL = timedelta(hours=1)
+DELIVERY_BATCH = 100
+MAX_LEAD = timedelta(hours=1)
+LEAD_MARGIN = 1.2
+THROUGHPUT_SMOOTHING = 0.3
+MIN_THROUGHPUT_SAMPLE = 50
+MAINTENANCE_INTERVAL = timedelta(hours=6)
+ARCHIVE_AFTER = timedelta(days=7)
+ARCHIVE_BATCH = 200
 
 
 class ReminderScheduler:
-    def __init__(self, db: Database, bot: Bot, timezone):
+    def __init__(
+        self,
+        db: Database,
+        bot: Bot,
+        timezone,
+        horizon: timedelta = HORIZON,
+        refill_interval: timedelta = REFILL_INTERVAL,
+        fanout: ReminderFanOut | None = None,
+    ):
         self._db = db
         self._bot = bot
-        self._scheduler = AsyncIOScheduler(timezone=timezone)
+        self._timezone = timezone
+        self._horizon = horizon
+        self._refill_interval = refill_interval
+        self._scheduler: AsyncIOScheduler | None = None
+        self._fanout = fanout or ReminderFanOut()
+        self._throughput = self._fanout.rate
+        self._heap: list[tuple[int, int]] = []
+        self._due: dict[int, int] = {}
+        self._horizon_end = 0
+        self._wakeup = asyncio.Event()
+        self._runner: asyncio.Task | None = None
+        self._sending: set[asyncio.Task] = set()
+        self._active_runs: set[int] = set()
 
     def start(self) -> None:
+        self._scheduler = AsyncIOScheduler(timezone=self._timezone)
         self._scheduler.start()
+        self._scheduler.add_job(
+            self.refill,
+            trigger="interval",
+            seconds=self._refill_interval.total_seconds(),
+            id="reminders_refill",
+            replace_existing=True,
+        )
+        self._scheduler.add_job(
+            self.maintain,
+            trigger="interval",
+            seconds=MAINTENANCE_INTERVAL.total_seconds(),
+            id="maintenance",
+            replace_existing=True,
+        )
+        self._runner = asyncio.get_running_loop().create_task(self._run())
 
-    def shutdown(self) -> None:
-        self._scheduler.shutdown()
+    async def shutdown(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            self._runner = None
+        if self._scheduler is not None:
+            self._scheduler.shutdown(wait=False)
+            self._scheduler = None
+        sending = list(self._sending)
+        for task in sending:
+            task.cancel()
+        # Interrupted runs hand their unsent chats back to the outbox before returning.
+        await asyncio.gather(*sending, return_exceptions=True)
 
-    def restore(self, now: datetime) -> None:
-        for event in self._db.list_future_events(now):
-            self.schedule_event(event.id, event.start_at, event.reminder_minutes)
+    async def restore(self, now: datetime) -> None:
+        for run in await self._db.recover_reminder_runs():
+            logger.info("Resuming unfinished reminder run %s for event %s", run.id, run.event_id)
+            self._spawn(self._resume_run(run))
+        await self.refill(now)
 
-    def schedule_event(self, event_id: int, start_at: datetime, reminder_minutes: int) -> None:
-        reminder_time = start_at - timedelta(minutes=reminder_minutes)
-        if reminder_time <= datetime.now(start_at.tzinfo):
-            return
-        self._scheduler.add_job(
-            self.send_reminder,
-            trigger="date",
-            run_date=reminder_time,
-            args=[event_id],
-            id=f"event_{event_id}",
-            replace_existing=True,
+    async def refill(self, now: datetime | None = None) -> None:
+        now = now or datetime.now(self._timezone)
+        horizon_end = to_epoch(now + self._horizon)
+        reminders = await self._db.list_due_reminders(now, now + self._horizon + MAX_LEAD)
+        self._due = {}
+        for event_id, remind_at, subscribers in reminders:
+            fire_at = remind_at - self.estimate_lead(subscribers)
+            if fire_at <= horizon_end:
+                self._due[event_id] = fire_at
+        # Reminders that are already due but never ran: missed while offline, or created on another worker.
+        for event_id, remind_at in await self._db.collect_missed_reminders(now):
+            logger.info("Reminder for event %s is overdue, sending now", event_id)
+            self._due[event_id] = remind_at
+        self._heap = [(fire_at, event_id) for event_id, fire_at in self._due.items()]
+        heapq.heapify(self._heap)
+        self._horizon_end = horizon_end
+        self._wakeup.set()
+        logger.info("Loaded %s reminders due within %s", len(self._due), self._horizon)
+
+    async def maintain(self, now: datetime | None = None) -> int:
+        now = now or datetime.now(self._timezone)
+        archived = 0
+        while True:
+            moved = await self._db.archive_events(now - ARCHIVE_AFTER, ARCHIVE_BATCH, now)
+            archived += moved
+            if moved < ARCHIVE_BATCH:
+                break
+            await asyncio.sleep(0)
+        await self._db.compact()
+        logger.info("Archived %s past events", archived)
+        return archived
+
+    def estimate_lead(self, subscribers: int) -> int:
+        seconds = math.ceil(subscribers / self._throughput * LEAD_MARGIN)
+        return min(seconds, int(MAX_LEAD.total_seconds()))
+
+    async def schedule_event(self, event_id: int, start_at: datetime, reminder_minutes: int) -> None:
+        await self.schedule_events([(event_id, start_at, reminder_minutes)])
+
+    async def schedule_events(self, events: list[tuple[int, datetime, int]]) -> None:
+        now = time.time()
+        counts = await asyncio.gather(
+            *(self._db.count_subscriptions(event_id) for event_id, _, _ in events)
         )
+        entries = []
+        overdue = []
+        for (event_id, start_at, reminder_minutes), subscribers in zip(events, counts):
+            remind_at = to_epoch(start_at - timedelta(minutes=reminder_minutes))
+            fire_at = remind_at - self.estimate_lead(subscribers)
+            if to_epoch(start_at) <= now or fire_at > self._horizon_end:
+                self._due.pop(event_id, None)
+                if to_epoch(start_at) > now and remind_at <= now:
+                    overdue.append(remind_at)
+                continue
+            self._due[event_id] = fire_at
+            entries.append((fire_at, event_id))
+        if overdue:
+            # Not scheduled here, so let the leader's next refill look back far enough to find it.
+            await self._db.rewind_missed_reminders(min(overdue))
+        if not entries:
+            return
+        if len(entries) == 1:
+            heapq.heappush(self._heap, entries[0])
+        else:
+            self._heap.extend(entries)
+            heapq.heapify(self._heap)
+        self._wakeup.set()
 
     def remove_event(self, event_id: int) -> None:
-        job_id = f"event_{event_id}"
-        if self._scheduler.get_job(job_id):
-            self._scheduler.remove_job(job_id)
+        self._due.pop(event_id, None)
 
-    async def send_reminder(self, event_id: int) -> None:
-        event = self._db.get_event(event_id)
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                fire_at, event_id = heapq.heappop(self._heap)
+                if self._due.get(event_id) != fire_at:
+                    continue
+                del self._due[event_id]
+                metrics.SCHEDULER_LAG_SECONDS.observe(now - fire_at)
+                self._spawn(self.send_reminder(event_id))
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.get_running_loop().create_task(self._guard(coro))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _guard(self, coro) -> None:
+        try:
+            await coro
+        except Exception:
+            logger.exception("Reminder run failed")
+
+    async def send_reminder(self, event_id: int) -> FanOutReport | None:
+        event = await self._db.get_event(event_id)
+        if not event:
+            return None
+        remind_at = event.remind_at
+        run = await self._db.start_reminder_run(event_id, remind_at, datetime.now(self._timezone))
+        if run.finished:
+            return None
+        return await self._deliver_run(run, event)
+
+    async def _resume_run(self, run: ReminderRun) -> None:
+        event = await self._db.get_event(run.event_id)
         if not event:
+            await self._db.finish_reminder_run(run.id, datetime.now(self._timezone))
             return
-        text = (
-            "Скоро событие!\n\n"
-            f"{event.text}\n"
-            f"📅 {event.start_at.strftime('%d.%m.%Y %H:%M')}"
+        await self._deliver_run(run, event)
+
+    async def _deliver_run(self, run: ReminderRun, event: Event) -> FanOutReport | None:
+        if run.id in self._active_runs:
+            return None
+        self._active_runs.add(run.id)
+        try:
+            return await self._deliver_batches(run, event)
+        finally:
+            self._active_runs.discard(run.id)
+
+    async def _release_batch(self, run: ReminderRun, batch: list[int], report: FanOutReport) -> None:
+        finished = set(report.delivered_chat_ids + report.failed_chat_ids + report.blocked_chat_ids)
+        in_doubt = set(report.in_doubt_chat_ids)
+        outcomes = (
+            _outcomes(report)
+            + [(user_id, DELIVERY_IN_DOUBT) for user_id in in_doubt]
+            + [(user_id, DELIVERY_PENDING) for user_id in batch if user_id not in finished | in_doubt]
         )
-        subscribers = self._db.list_subscribers(event_id)
-        for user_id in subscribers:
+        await self._db.mark_deliveries(run.id, outcomes)
+        await self._db.block_chats(report.blocked_chat_ids, datetime.now(self._timezone))
+        logger.info(
+            "Reminder run %s interrupted, %s chats returned to the outbox",
+            run.id,
+            len(batch) - len(finished) - len(in_doubt),
+        )
+
+    async def _deliver_batches(self, run: ReminderRun, event: Event) -> FanOutReport:
+        text = render.reminder_caption(event)
+
+        async def send(user_id: int) -> None:
+            if event.image_file_id:
+                await self._bot.send_photo(user_id, photo=event.image_file_id, caption=text)
+            else:
+                await self._bot.send_message(user_id, text)
+
+        started = time.monotonic()
+        after_user_id = 0
+        attempted = 0
+        blocked: list[int] = []
+        while True:
+            claim = asyncio.ensure_future(self._db.claim_deliveries(run.id, after_user_id, DELIVERY_BATCH))
+            report = FanOutReport()
             try:
-                if event.image_file_id:
-                    await self._bot.send_photo(user_id, photo=event.image_file_id, caption=text)
-                else:
-                    await self._bot.send_message(user_id, text)
-            except (TelegramForbiddenError, TelegramNotFound):
-                self._db.remove_subscription(user_id, event_id)
+                batch = await asyncio.shield(claim)
+            except asyncio.CancelledError:
+                await self._release_batch(run, await claim, report)
+                raise
+            if not batch:
+                break
+            after_user_id = batch[-1]
+            attempted += len(batch)
+            try:
+                await self._fanout.run(batch, send, report)
+            except asyncio.CancelledError:
+                await self._release_batch(run, batch, report)
+                raise
+            await self._db.mark_deliveries(run.id, _outcomes(report))
+            blocked.extend(report.blocked_chat_ids)
+        await self._db.block_chats(blocked, datetime.now(self._timezone))
+        elapsed = time.monotonic() - started
+        deadline_miss = time.time() - run.remind_at
+        counts = await self._db.finish_reminder_run(
+            run.id,
+            datetime.now(self._timezone),
+            deadline_miss=deadline_miss,
+        )
+        report = FanOutReport(
+            delivered=counts.get(DELIVERY_SENT, 0),
+            failed=counts.get(DELIVERY_FAILED, 0),
+            pruned=counts.get(DELIVERY_PRUNED, 0),
+            elapsed=elapsed,
+        )
+        if attempted >= MIN_THROUGHPUT_SAMPLE and elapsed > 0:
+            self._throughput += THROUGHPUT_SMOOTHING * (attempted / elapsed - self._throughput)
+        metrics.REMINDER_RUNS.inc()
+        metrics.REMINDER_DELIVERIES.inc("sent", amount=report.delivered)
+        metrics.REMINDER_DELIVERIES.inc("failed", amount=report.failed)
+        metrics.REMINDER_DELIVERIES.inc("pruned", amount=report.pruned)
+        metrics.REMINDER_DELIVERIES.inc("in_doubt", amount=counts.get(DELIVERY_IN_DOUBT, 0))
+        metrics.REMINDER_RUN_SECONDS.observe(elapsed)
+        metrics.REMINDER_DEADLINE_MISS_SECONDS.observe(max(0.0, deadline_miss))
+        metrics.REMINDER_THROUGHPUT.set(self._throughput)
+        logger.info(
+            "Reminder for event %s: delivered=%s failed=%s pruned=%s in_doubt=%s in %.1f s, "
+            "deadline %s by %.1f s",
+            event.id,
+            report.delivered,
+            report.failed,
+            report.pruned,
+            counts.get(DELIVERY_IN_DOUBT, 0),
+            report.elapsed,
+            "missed" if deadline_miss > 0 else "met",
+            abs(deadline_miss),
+        )
+        return report
+
+
+def _outcomes(report: FanOutReport) -> list[tuple[int, int]]:
+    return (
+        [(user_id, DELIVERY_SENT) for user_id in report.delivered_chat_ids]
+        + [(user_id, DELIVERY_FAILED) for user_id in report.failed_chat_ids]
+        + [(user_id, DELIVERY_PRUNED) for user_id in report.blocked_chat_ids]
+    )
@@ -13,3 +13,7 @@ class AdminEditEvent(StatesGroup):
     waiting_text = State()
     waiting_reminder = State()
     waiting_image = State()
+
+
+class AdminImportEvents(StatesGroup):
+    waiting_document = State()
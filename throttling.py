@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import CallbackQuery
+
+import callbacks
+import metrics
+
+
+logger = logging.getLogger(__name__)
+
+ACTION_RATE = 2.0
+ACTION_BURST = 5.0
+DEBOUNCE_WINDOW = 0.7
+MAX_TRACKED = 10_000
+THROTTLED_TEXT = "Слишком часто, подождите немного"
+
+Handler = Callable[[CallbackQuery, dict[str, Any]], Awaitable[Any]]
+
+
+class CallbackThrottleMiddleware(BaseMiddleware):
+    def __init__(
+        self,
+        rate: float = ACTION_RATE,
+        burst: float = ACTION_BURST,
+        debounce: float = DEBOUNCE_WINDOW,
+        max_tracked: int = MAX_TRACKED,
+    ):
+        self._rate = rate
+        self._burst = burst
+        self._debounce = debounce
+        self._max_tracked = max_tracked
+        self._buckets: dict[tuple[int, str], tuple[float, float]] = {}
+        self._in_flight: dict[tuple[int, str], asyncio.Future] = {}
+        self._finished: dict[tuple[int, str], float] = {}
+        self.passed = 0
+        self.merged = 0
+        self.debounced = 0
+        self.dropped = 0
+
+    async def __call__(self, handler: Handler, event: CallbackQuery, data: dict[str, Any]) -> Any:
+        if event.from_user is None or not event.data:
+            return await handler(event, data)
+        key = (event.from_user.id, event.data)
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.merged += 1
+            metrics.CALLBACK_THROTTLE.inc("merged")
+            result = await asyncio.shield(in_flight)
+            await self._answer(event)
+            return result
+        now = time.monotonic()
+        finished_at = self._finished.get(key)
+        if finished_at is not None and now - finished_at < self._debounce:
+            self.debounced += 1
+            metrics.CALLBACK_THROTTLE.inc("debounced")
+            await self._answer(event)
+            return None
+        if not self._take(event.from_user.id, event.data, now):
+            self.dropped += 1
+            metrics.CALLBACK_THROTTLE.inc("dropped")
+            await self._answer(event, THROTTLED_TEXT)
+            return None
+        self.passed += 1
+        metrics.CALLBACK_THROTTLE.inc("passed")
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        result = None
+        try:
+            result = await handler(event, data)
+            return result
+        finally:
+            del self._in_flight[key]
+            future.set_result(result)
+            self._finished[key] = time.monotonic()
+            if len(self._finished) + len(self._buckets) > self._max_tracked:
+                self._prune(time.monotonic())
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "passed": self.passed,
+            "merged": self.merged,
+            "debounced": self.debounced,
+            "dropped": self.dropped,
+        }
+
+    def _take(self, user_id: int, data: str, now: float) -> bool:
+        callback = callbacks.decode(data)
+        key = (user_id, callback.action if callback else data)
+        tokens, updated = self._buckets.get(key, (self._burst, now))
+        tokens = min(self._burst, tokens + (now - updated) * self._rate)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            return False
+        self._buckets[key] = (tokens - 1, now)
+        return True
+
+    def _prune(self, now: float) -> None:
+        self._finished = {
+            key: finished_at
+            for key, finished_at in self._finished.items()
+            if now - finished_at < self._debounce
+        }
+        refill_time = self._burst / self._rate
+        self._buckets = {
+            key: (tokens, updated)
+            for key, (tokens, updated) in self._buckets.items()
+            if now - updated < refill_time
+        }
+
+    async def _answer(self, event: CallbackQuery, text: str | None = None) -> None:
+        try:
+            await event.answer(text)
+        except TelegramBadRequest as exc:
+            logger.debug("Could not answer throttled callback: %s", exc)
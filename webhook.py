@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from config import Config
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        concurrency: int,
+        secret_token: str | None = None,
+        **data: Any,
+    ) -> None:
+        super().__init__(
+            dispatcher,
+            bot,
+            handle_in_background=True,
+            secret_token=secret_token,
+            **data,
+        )
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        await self._slots.acquire()
+        try:
+            return await super()._handle_request_background(bot, request)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def _background_feed_update(self, bot: Bot, update: dict[str, Any]) -> None:
+        try:
+            await super()._background_feed_update(bot, update)
+        finally:
+            self._slots.release()
+
+
+async def start_webhook_server(dispatcher: Dispatcher, bot: Bot, config: Config) -> web.AppRunner:
+    app = web.Application()
+    handler = BoundedRequestHandler(
+        dispatcher,
+        bot,
+        config.webhook_concurrency,
+        secret_token=config.webhook_secret,
+    )
+    handler.register(app, path=config.webhook_path)
+    setup_application(app, dispatcher, bot=bot)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, config.webhook_host, config.webhook_port, reuse_port=config.workers > 1)
+    await site.start()
+    return runner
+
+
+async def run_webhook(dispatcher: Dispatcher, bot: Bot, config: Config) -> None:
+    runner = await start_webhook_server(dispatcher, bot, config)
+    try:
+        if config.webhook_url:
+            await bot.set_webhook(
+                config.webhook_url.rstrip("/") + config.webhook_path,
+                secret_token=config.webhook_secret,
+                allowed_updates=dispatcher.resolve_used_update_types(),
+            )
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 0.05
+FLUSH_BATCH = 500
+
+
+@dataclass
+class PendingChange:
+    subscribed: bool
+    at: int
+    was_subscribed: bool
+
+    @property
+    def delta(self) -> int:
+        return int(self.subscribed) - int(self.was_subscribed)
+
+
+Batch = dict[tuple[int, int], PendingChange]
+
+
+class SubscriptionQueue:
+    def __init__(
+        self,
+        apply: Callable[[Batch], Awaitable[None]],
+        interval: float = FLUSH_INTERVAL,
+        batch_size: int = FLUSH_BATCH,
+    ):
+        self._apply = apply
+        self._interval = interval
+        self._batch_size = batch_size
+        self._pending: Batch = {}
+        self._flushing: Batch = {}
+        self._deltas: dict[int, int] = {}
+        self._flush_lock = asyncio.Lock()
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def state(self, user_id: int, event_id: int) -> bool | None:
+        key = (user_id, event_id)
+        change = self._pending.get(key) or self._flushing.get(key)
+        return change.subscribed if change else None
+
+    def count_delta(self, event_id: int) -> int:
+        return self._deltas.get(event_id, 0)
+
+    def put(self, user_id: int, event_id: int, subscribed: bool, at: int, was_subscribed: bool) -> None:
+        key = (user_id, event_id)
+        previous = self._pending.get(key) or self._flushing.get(key)
+        if previous is not None:
+            if previous.subscribed == subscribed:
+                return
+            was_subscribed = previous.subscribed
+        if was_subscribed == subscribed:
+            return
+        base = self._pending.get(key)
+        change = PendingChange(
+            subscribed=subscribed,
+            at=at,
+            was_subscribed=base.was_subscribed if base else was_subscribed,
+        )
+        self._adjust(event_id, change.delta - (base.delta if base else 0))
+        if change.delta:
+            self._pending[key] = change
+        else:
+            self._pending.pop(key, None)
+        self._schedule()
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            self._cancel_timer()
+            if not self._pending:
+                return
+            self._flushing, self._pending = self._pending, {}
+            try:
+                await self._apply(self._flushing)
+            except Exception:
+                logger.exception("Failed to flush %s subscription changes", len(self._flushing))
+                for key, change in self._flushing.items():
+                    newer = self._pending.get(key)
+                    if newer is not None:
+                        newer.was_subscribed = change.was_subscribed
+                    else:
+                        self._pending[key] = change
+                self._flushing = {}
+                self._schedule()
+                raise
+            for (_, event_id), change in self._flushing.items():
+                self._adjust(event_id, -change.delta)
+            self._flushing = {}
+
+    def _adjust(self, event_id: int, delta: int) -> None:
+        if not delta:
+            return
+        value = self._deltas.get(event_id, 0) + delta
+        if value:
+            self._deltas[event_id] = value
+        else:
+            self._deltas.pop(event_id, None)
+
+    def _schedule(self) -> None:
+        if len(self._pending) >= self._batch_size:
+            self._cancel_timer()
+            self._spawn_flush()
+        elif self._timer is None and self._pending:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self._interval, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._spawn_flush()
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _spawn_flush(self) -> None:
+        task = asyncio.get_running_loop().create_task(self._flush_quietly())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush_quietly(self) -> None:
+        try:
+            await self.flush()
+        except Exception:
+            pass